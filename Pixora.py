@@ -1,13 +1,53 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from PySide6.QtGui import QIcon
-from image_downloader_app import ImageDownloaderApp
+import argparse
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(prog="Pixora")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="queue every URL in a .txt/.csv file on startup ('-' reads stdin)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print import times and a startup timeline to stderr, then exit",
+    )
+    args, qt_args = parser.parse_known_args()
+
+    # Installed before Qt and the app are imported so that they are timed too
+    profiler = None
+    if args.profile_startup:
+        from utils.startup_profile import StartupProfiler
+
+        profiler = StartupProfiler()
+        profiler.install()
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QIcon
+    from PySide6.QtCore import QTimer
+    from image_downloader_app import ImageDownloaderApp
+
+    if profiler:
+        profiler.mark("modules imported")
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle("Fusion")
     window = ImageDownloaderApp()
     window.setWindowIcon(QIcon("icons/logo.svg"))
+    if profiler:
+        profiler.mark("main window built")
     window.show()
+    if args.batch:
+        window.import_url_file(args.batch)
+    if profiler:
+
+        def report():
+            # Runs on the first pass of the event loop, after the window is shown
+            profiler.mark("window shown, event loop idle")
+            profiler.uninstall()
+            print(profiler.report(), file=sys.stderr, flush=True)
+            app.quit()
+
+        QTimer.singleShot(0, report)
     sys.exit(app.exec())
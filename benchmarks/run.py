@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Kept to light imports: a child's peak RSS on Linux starts at the parent's,
+# so a heavy runner would inflate every measurement
+from downloader.metrics import percentile  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_REPEAT = 3
+
+# Each scenario is one pixora-cli run. "images" cycles (ext, width, height)
+# over the URLs; count is scaled by --scale. Rate limits, the HTTP cache and
+# dedup are off in every run so the numbers measure the pipeline itself:
+# the server hands out identical bytes per size, which dedup would hardlink.
+SCENARIOS = {
+    "single": {
+        "count": 1,
+        "images": [("jpg", 4000, 3000)],
+        "args": ["--jobs", "1"],
+    },
+    "batch": {
+        "count": 200,
+        "images": [("jpg", 1280, 960), ("png", 800, 600), ("webp", 1024, 768)],
+        "args": [],
+    },
+    "concurrent-threaded": {
+        "count": 500,
+        "images": [("jpg", 640, 480)],
+        "latency": 50,
+        "args": ["--jobs", "64"],
+    },
+    "concurrent-asyncio": {
+        "count": 500,
+        "images": [("jpg", 640, 480)],
+        "latency": 50,
+        "args": ["--engine", "asyncio", "--jobs", "256"],
+        "requires_asyncio": True,
+    },
+    "flaky": {
+        "count": 200,
+        "images": [("jpg", 640, 480)],
+        "latency": 10,
+        "fail": 0.2,
+        "args": ["--jobs", "32"],
+    },
+    "transform": {
+        "count": 40,
+        "images": [("jpg", 4000, 3000)],
+        "args": ["--max-dimension", "1024", "--format", "webp"],
+    },
+}
+COMMON_ARGS = ["--rps", "0", "--per-host", "64", "--no-cache", "--dedup", "off"]
+COMMON_ARGS += ["--json"]
+
+
+def scenario_urls(name, scenario, base_url, scale):
+    count = max(1, round(scenario["count"] * scale))
+    query = []
+    for key in ("latency", "fail"):
+        if scenario.get(key):
+            query.append(f"{key}={scenario[key]}")
+    urls = []
+    for index in range(count):
+        ext, width, height = scenario["images"][index % len(scenario["images"])]
+        params = "&".join([f"w={width}", f"h={height}"] + query)
+        urls.append(f"{base_url}/img/{name}-{index}.{ext}?{params}")
+    return urls
+
+
+def run_cli(args, env):
+    # The CLI runs in a child so its peak RSS and CPU time are its own and
+    # not mixed with the server's; wait4 gives the usage of that one child
+    command = [sys.executable, os.path.join(ROOT, "pixora_cli.py")] + args
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command, env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    output = process.stdout.read()
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    else:
+        process.wait()
+        usage = None
+    wall = time.perf_counter() - started
+    process.stdout.close()
+    return output.decode(errors="replace"), wall, usage
+
+
+def peak_rss_mb(usage):
+    if usage is None:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / (1024 * 1024), 1)
+
+
+def start_server():
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.server"],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    base_url = process.stdout.readline().strip()
+    if not base_url:
+        process.wait()
+        raise RuntimeError("benchmark server did not start")
+    return process, base_url
+
+
+def stop_server(process):
+    # Closing stdin is the server's signal to shut down
+    process.stdin.close()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def warm(base_url, images):
+    # Has the server generate every payload before the clock starts
+    for ext, width, height in images:
+        with urlopen(f"{base_url}/img/warm.{ext}?w={width}&h={height}") as response:
+            response.read()
+
+
+def run_scenario(name, scenario, base_url, scale):
+    warm(base_url, scenario["images"])
+    urls = scenario_urls(name, scenario, base_url, scale)
+    workdir = tempfile.mkdtemp(prefix=f"pixora-bench-{name}-")
+    try:
+        # A fresh home keeps history, cache and dedup databases out of the
+        # user's ~/.pixora and starts every run from the same empty state
+        env = dict(os.environ, HOME=workdir, USERPROFILE=workdir)
+        url_file = os.path.join(workdir, "urls.txt")
+        metrics_file = os.path.join(workdir, "metrics.json")
+        with open(url_file, "w") as f:
+            f.write("\n".join(urls))
+        args = ["--input", url_file, "--output", os.path.join(workdir, "out")]
+        args += ["--metrics", metrics_file] + COMMON_ARGS + scenario["args"]
+        output, wall, usage = run_cli(args, env)
+        results = [json.loads(line) for line in output.splitlines() if line]
+        try:
+            with open(metrics_file) as f:
+                downloads = json.load(f)["downloads"]
+        except (OSError, ValueError):
+            downloads = []
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return summarize(urls, results, downloads, wall, usage)
+
+
+def summarize(urls, results, downloads, wall, usage):
+    ok = [record for record in downloads if record["ok"]]
+    size = sum(record["bytes"] for record in ok)
+    summary = {
+        "urls": len(urls),
+        "ok": sum(result["ok"] for result in results),
+        "failed": sum(not result["ok"] for result in results),
+        "attempts": sum(result.get("attempts", 0) for result in results),
+        "wall_s": round(wall, 3),
+        "images_per_s": round(len(ok) / wall, 2) if wall else None,
+        "mb_per_s": round(size / (1024 * 1024) / wall, 2) if wall else None,
+        "peak_rss_mb": peak_rss_mb(usage),
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 3) if usage else None,
+    }
+    for span in ("total", "ttfb", "transfer", "transform"):
+        values = sorted(record[span] for record in ok if span in record)
+        for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            value = percentile(values, fraction)
+            summary[f"{span}_{label}_ms"] = (
+                None if value is None else round(value * 1000, 2)
+            )
+    return summary
+
+
+def median_run(runs):
+    # The run with the median wall time, so all fields come from one run
+    return sorted(runs, key=lambda run: run["wall_s"])[len(runs) // 2]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": git_revision(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(baseline, current):
+    # Positive deltas are slower or larger for every metric except the rates
+    rates = ("images_per_s", "mb_per_s")
+    keys = ("wall_s", "images_per_s", "mb_per_s", "total_p50_ms", "total_p95_ms")
+    keys += ("peak_rss_mb", "cpu_s")
+    print(f"\nvs {baseline['environment'].get('commit')}:")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        changes = []
+        for key in keys:
+            old, new = before.get(key), result.get(key)
+            if not old or new is None:
+                continue
+            delta = (new - old) / old * 100
+            worse = delta < 0 if key in rates else delta > 0
+            marker = "!" if worse and abs(delta) >= 10 else ""
+            changes.append(f"{key} {delta:+.1f}%{marker}")
+        print(f"  {name:<20} " + ", ".join(changes))
+
+
+def print_result(name, result):
+    print(
+        f"{name:<20} {result['ok']:>5}/{result['urls']:<5} "
+        f"{result['wall_s']:>8.2f}s {result['images_per_s'] or 0:>8.1f} img/s "
+        f"{result['mb_per_s'] or 0:>7.1f} MB/s "
+        f"p50 {result['total_p50_ms'] or 0:>7.1f}ms "
+        f"p95 {result['total_p95_ms'] or 0:>7.1f}ms "
+        f"rss {result['peak_rss_mb'] or 0:>6.1f}MB cpu {result['cpu_s'] or 0:.2f}s",
+        flush=True,
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark the download pipeline against a local image server.",
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        metavar="SCENARIO",
+        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        metavar="N",
+        help="run each scenario N times and keep the median run",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        metavar="X",
+        help="multiply every scenario's URL count by X",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="FILE",
+        help="results file (default benchmarks/results/<commit>.json)",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="print the change against an earlier results file",
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.scale <= 0:
+        parser.error("--repeat must be at least 1 and --scale positive")
+    if unknown := [name for name in args.scenarios if name not in SCENARIOS]:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read {args.compare}: {e}")
+    names = args.scenarios or list(SCENARIOS)
+    current = {
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "scale": args.scale},
+        "scenarios": {},
+    }
+    server, base_url = start_server()
+    try:
+        for name in names:
+            scenario = SCENARIOS[name]
+            if scenario.get("requires_asyncio") and not importlib.util.find_spec(
+                "aiohttp"
+            ):
+                print(f"{name:<20} skipped: aiohttp is not installed", flush=True)
+                continue
+            runs = [
+                run_scenario(name, scenario, base_url, args.scale)
+                for _ in range(args.repeat)
+            ]
+            current["scenarios"][name] = median_run(runs)
+            print_result(name, current["scenarios"][name])
+    finally:
+        stop_server(server)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{current['environment']['commit'] or 'results'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(current, f, indent=1)
+    print(f"\nResults written to {output}")
+    if baseline:
+        compare(baseline, current)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import io
+import sys
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from PIL import Image
+
+# Stand-in image host for the benchmarks. Every image is described by its
+# URL, so a scenario controls the workload without configuring the server:
+#   /img/<n>.<ext>?w=800&h=600&latency=20&fail=0.1
+# w/h: pixel size; latency: ms before the response headers; fail: share of
+# URLs whose first request gets a 503. Bytes are seeded noise, generated
+# once per (format, size), so every run serves identical payloads.
+
+CONTENT_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "bmp": "image/bmp",
+}
+EXTENSIONS = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp"}
+EXTENSIONS.update(gif="gif", bmp="bmp")
+
+
+def make_image(image_format, width, height, seed=0):
+    rng = random.Random(seed)
+    # Smooth noise at 1/8 scale compresses like a photo rather than like
+    # random bytes (incompressible) or a flat color (nearly free)
+    small = Image.frombytes(
+        "RGB",
+        (max(1, width // 8), max(1, height // 8)),
+        rng.randbytes(max(1, width // 8) * max(1, height // 8) * 3),
+    )
+    image = small.resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(
+        buffer,
+        image_format.upper(),
+        **({"quality": 85} if image_format == "jpeg" else {}),
+    )
+    return buffer.getvalue()
+
+
+def fails_first_request(path, rate):
+    # Deterministic per URL, so every run fails the same requests
+    return rate > 0 and random.Random(path).random() < rate
+
+
+class ImageStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._images = {}
+        self._failed = set()
+
+    def get(self, image_format, width, height):
+        key = (image_format, width, height)
+        with self._lock:
+            if key not in self._images:
+                self._images[key] = make_image(image_format, width, height)
+            return self._images[key]
+
+    def should_fail(self, path, rate):
+        with self._lock:
+            if path in self._failed or not fails_first_request(path, rate):
+                return False
+            self._failed.add(path)
+            return True
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def respond(self, head):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        ext = url.path.rpartition(".")[2].lower()
+        if not url.path.startswith("/img/") or ext not in EXTENSIONS:
+            return self.send_status(404)
+        try:
+            width = int(query.get("w", 640))
+            height = int(query.get("h", 480))
+            latency = float(query.get("latency", 0)) / 1000
+            fail_rate = float(query.get("fail", 0))
+        except ValueError:
+            return self.send_status(400)
+        if latency:
+            time.sleep(latency)
+        # HEAD preflights do not count as the failing first request
+        if not head and self.server.store.should_fail(self.path, fail_rate):
+            return self.send_status(503)
+        image_format = EXTENSIONS[ext]
+        body = self.server.store.get(image_format, width, height)
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[image_format])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_status(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class BenchmarkServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Thousands of concurrent connects must not overflow the listen backlog
+    request_queue_size = 4096
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), ImageHandler)
+        self.store = ImageStore()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+def main(argv=None):
+    # Runs in its own process so neither its CPU time nor its memory (the
+    # cached payloads) is counted against the downloads being measured.
+    # Prints the base URL, then serves until stdin closes.
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.server",
+        description="Serve synthetic images for the download benchmarks.",
+    )
+    parser.add_argument("--port", type=int, default=0, help="default: any free port")
+    args = parser.parse_args(argv)
+    server = BenchmarkServer(args.port)
+    print(server.base_url, flush=True)
+    threading.Thread(
+        target=lambda: (sys.stdin.read(), server.shutdown()), daemon=True
+    ).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+import itertools
+from collections import deque, Counter
+from PySide6.QtCore import QObject, QThread, QTimer, QDeadlineTimer, Signal, Slot
+from download_worker import DownloadWorker, AsyncDownloadWorker
+from downloader.engines import (
+    resolve_engine,
+    ENGINE_THREADED,
+    ENGINE_ASYNCIO,
+    DEFAULT_MAX_IN_FLIGHT,
+    MAX_IN_FLIGHT_LIMIT,
+)
+from downloader.progress import ProgressAggregator, PROGRESS_INTERVAL_MS
+from downloader.rate_limiter import (
+    host_key,
+    DEFAULT_HOST_CONCURRENCY,
+    MAX_HOST_CONCURRENCY,
+)
+
+DEFAULT_MAX_CONCURRENT = 4
+# How long closing the app waits for cancelled threaded downloads to stop
+SHUTDOWN_WAIT_MS = 5000
+MAX_CONCURRENT_LIMIT = 16
+
+# Threads that outlived shutdown(), kept referenced until the process exits
+_stuck_threads = []
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class DownloadJob:
+    def __init__(self, job_id, url, folder_path, options=None):
+        self.job_id = job_id
+        self.url = url
+        self.host = host_key(url)
+        self.folder_path = folder_path
+        # Keyword arguments for DownloadTask (custom_filename, output_format...)
+        self.options = options or {}
+        self.status = QUEUED
+        self.message = ""
+        self.result = ""
+        self.filename = ""
+        self.content_hash = None
+        # Latest TransferProgress snapshot while the body downloads
+        self.transfer = None
+        self.worker = None
+        # QThread running a threaded download, None on the asyncio engine
+        self.thread = None
+        self.cancel_requested = False
+        # Requests made across automatic retries and manual re-runs
+        self.attempts = 0
+
+
+class _JobRelay(QObject):
+    # Lives in the GUI thread so worker signals are delivered there tagged
+    # with the job they belong to
+    def __init__(self, queue, job):
+        super().__init__(queue)
+        self.queue = queue
+        self.job = job
+
+    @Slot(bool, str, str)
+    def on_finished(self, success, result, filename):
+        self.queue._handle_finished(self.job, success, result, filename)
+        self.deleteLater()
+
+
+class DownloadQueue(QObject):
+    # First and last id of a block of consecutively numbered new jobs
+    jobs_added = Signal(int, int)
+    job_status_changed = Signal(int, str)
+    # Ids of the jobs with new progress since the last frame, most recent last
+    jobs_progressed = Signal(list)
+    job_finished = Signal(int, bool, str, str)
+    queue_changed = Signal()
+
+    def __init__(self, parent=None, max_concurrent=DEFAULT_MAX_CONCURRENT):
+        super().__init__(parent)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.engine = ENGINE_THREADED
+        self.max_in_flight = DEFAULT_MAX_IN_FLIGHT
+        self.max_per_host = DEFAULT_HOST_CONCURRENCY
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        # Cancelled entries are skipped lazily when popped, so pending_count
+        # is tracked separately from the deque length
+        self._pending = deque()
+        self._pending_count = 0
+        self._active = {}
+        # Jobs whose host is at max_per_host wait here, in order, per host
+        self._parked = {}
+        self._host_active = Counter()
+        self._async_engine_started = False
+        self._progress = ProgressAggregator()
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(PROGRESS_INTERVAL_MS)
+        self._progress_timer.timeout.connect(self._flush_progress)
+
+    def set_max_concurrent(self, max_concurrent):
+        self.max_concurrent = max(1, min(int(max_concurrent), MAX_CONCURRENT_LIMIT))
+        self._start_next()
+
+    def set_max_per_host(self, max_per_host):
+        self.max_per_host = max(1, min(int(max_per_host), MAX_HOST_CONCURRENCY))
+        for host in list(self._parked):
+            self._unpark(host, len(self._parked[host]))
+        self._start_next()
+
+    def set_engine(self, engine, max_in_flight=None):
+        # Jobs already running finish on the engine they started on. Returns
+        # the engine actually used, which is the threaded one when aiohttp is
+        # not installed.
+        self.engine = resolve_engine(engine)
+        if max_in_flight is not None:
+            self.max_in_flight = max(1, min(int(max_in_flight), MAX_IN_FLIGHT_LIMIT))
+        self._start_next()
+        return self.engine
+
+    def concurrency_limit(self):
+        if self.engine == ENGINE_ASYNCIO:
+            return self.max_in_flight
+        return self.max_concurrent
+
+    def pending_count(self):
+        return self._pending_count
+
+    def active_count(self):
+        return len(self._active)
+
+    def is_busy(self):
+        return bool(self._active or self._pending_count)
+
+    def enqueue(self, url, folder_path, **options):
+        return self.enqueue_many([url], folder_path, **options)[0]
+
+    def enqueue_many(self, urls, folder_path, **options):
+        job_ids = []
+        for url in urls:
+            job = DownloadJob(next(self._ids), url, folder_path, options)
+            self.jobs[job.job_id] = job
+            self._pending.append(job)
+            job_ids.append(job.job_id)
+        if not job_ids:
+            return job_ids
+        self._pending_count += len(job_ids)
+        # One notification per batch keeps 50k-URL imports from flooding views
+        self.jobs_added.emit(job_ids[0], job_ids[-1])
+        self._start_next()
+        self.queue_changed.emit()
+        return job_ids
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        if job.status == QUEUED:
+            self._pending_count -= 1
+            job.message = "Download cancelled"
+            self._set_status(job, CANCELLED)
+            self.job_finished.emit(job.job_id, False, job.message, "")
+            self.queue_changed.emit()
+            return True
+        if job.status == RUNNING:
+            job.cancel_requested = True
+            job.worker.cancel()
+            return True
+        return False
+
+    def cancel_all(self):
+        pending = itertools.chain(self._pending, *self._parked.values())
+        for job_id in [job.job_id for job in pending] + list(self._active):
+            self.cancel(job_id)
+
+    def retry(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in (FAILED, CANCELLED):
+            return False
+        job.message = ""
+        job.result = ""
+        job.transfer = None
+        job.cancel_requested = False
+        self._set_status(job, QUEUED)
+        self._pending.append(job)
+        self._pending_count += 1
+        self._start_next()
+        self.queue_changed.emit()
+        return True
+
+    def remove_finished(self):
+        self.jobs = {
+            job_id: job
+            for job_id, job in self.jobs.items()
+            if job.status in (QUEUED, RUNNING)
+        }
+
+    def _set_status(self, job, status):
+        job.status = status
+        self.job_status_changed.emit(job.job_id, status)
+
+    def _start_next(self):
+        limit = self.concurrency_limit()
+        while len(self._active) < limit and (job := self._next_runnable()):
+            self._pending_count -= 1
+            self._start(job)
+
+    def _next_runnable(self):
+        while self._pending:
+            job = self._pending.popleft()
+            if job.status != QUEUED:
+                continue
+            if self._host_active[job.host] >= self.max_per_host:
+                # A long run of URLs from one host must not leave the other
+                # slots idle, so those jobs step aside until the host frees up
+                self._parked.setdefault(job.host, deque()).append(job)
+                continue
+            return job
+        return None
+
+    def _unpark(self, host, count=1):
+        parked = self._parked.get(host)
+        ready = []
+        while parked and len(ready) < count:
+            job = parked.popleft()
+            if job.status == QUEUED:
+                ready.append(job)
+        if not parked:
+            self._parked.pop(host, None)
+        # Back to the front of the line, keeping their original order
+        self._pending.extendleft(reversed(ready))
+
+    def _start(self, job):
+        self._host_active[job.host] += 1
+        if not self._progress_timer.isActive():
+            self._progress_timer.start()
+        if self.engine == ENGINE_ASYNCIO:
+            self._start_async(job)
+        else:
+            self._start_threaded(job)
+
+    def _start_async(self, job):
+        worker = AsyncDownloadWorker(
+            job.url,
+            job.folder_path,
+            on_progress=self._progress.reporter(job.job_id),
+            on_transfer=self._progress.transfer_reporter(job.job_id),
+            **job.options,
+        )
+        relay = _JobRelay(self, job)
+        worker.finished.connect(relay.on_finished)
+        worker.finished.connect(worker.deleteLater)
+
+        job.worker = worker
+        self._active[job.job_id] = job
+        self._set_status(job, RUNNING)
+        worker.start(self._async_engine())
+
+    def _async_engine(self):
+        # Imported and started with the first asyncio download rather than
+        # when the engine is picked, which happens at startup
+        from downloader.async_engine import get_async_engine
+
+        self._async_engine_started = True
+        engine = get_async_engine()
+        engine.reserve(self.max_in_flight)
+        return engine
+
+    def shutdown(self, timeout_ms=SHUTDOWN_WAIT_MS):
+        # Cancels everything and waits for the download threads to return;
+        # Qt aborts the process if a QThread is destroyed while it runs
+        self.cancel_all()
+        self._progress_timer.stop()
+        deadline = QDeadlineTimer(timeout_ms)
+        for job in list(self._active.values()):
+            if (thread := job.thread) is None:
+                continue
+            # The worker's finished signal cannot reach thread.quit() while
+            # the GUI thread is blocked here, so the thread is told directly
+            thread.quit()
+            if not thread.wait(deadline):
+                # Still stuck in a read; leave it unparented so the queue
+                # can be destroyed, and let the process exit take it down
+                thread.setParent(None)
+                _stuck_threads.append(thread)
+        if self._async_engine_started:
+            from downloader.async_engine import shutdown_async_engine
+
+            shutdown_async_engine()
+
+    def _start_threaded(self, job):
+        # Parented to the queue so Qt, not the Python wrapper, owns the thread
+        thread = QThread(self)
+        worker = DownloadWorker(
+            job.url,
+            job.folder_path,
+            on_progress=self._progress.reporter(job.job_id),
+            on_transfer=self._progress.transfer_reporter(job.job_id),
+            **job.options,
+        )
+        worker.moveToThread(thread)
+        relay = _JobRelay(self, job)
+
+        thread.started.connect(worker.download)
+        worker.finished.connect(relay.on_finished)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+
+        job.worker = worker
+        job.thread = thread
+        self._active[job.job_id] = job
+        self._set_status(job, RUNNING)
+        thread.start()
+
+    def _flush_progress(self):
+        updated = []
+        for job_id, fields in self._progress.drain().items():
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == RUNNING:
+                job.message = fields.get("message", job.message)
+                job.transfer = fields.get("transfer", job.transfer)
+                updated.append(job_id)
+        if updated:
+            self.jobs_progressed.emit(updated)
+        elif not self._active:
+            self._progress_timer.stop()
+
+    def _handle_finished(self, job, success, result, filename):
+        self._active.pop(job.job_id, None)
+        # Reports still waiting for the next frame would overwrite the result
+        self._progress.discard(job.job_id)
+        self._host_active[job.host] -= 1
+        if not self._host_active[job.host]:
+            del self._host_active[job.host]
+        self._unpark(job.host)
+        job.attempts += job.worker.task.attempts
+        job.content_hash = job.worker.task.saved_hash()
+        job.worker = None
+        job.thread = None
+        job.result = result
+        job.filename = filename
+        if success:
+            job.message = filename
+            self._set_status(job, DONE)
+        else:
+            job.message = result
+            self._set_status(job, CANCELLED if job.cancel_requested else FAILED)
+        self.job_finished.emit(job.job_id, success, result, filename)
+        self._start_next()
+        self.queue_changed.emit()
@@ -1,83 +1,81 @@
-import os
-import re
-import requests
-from urllib.parse import urlparse
-from PIL import Image
-from io import BytesIO
+import threading
 from PySide6.QtCore import QObject, Signal
-from icon_provider import IconProvider
 
 
 class DownloadWorker(QObject):
-    progress = Signal(str)
+    # on_progress (status messages) and on_transfer (byte counts) are called
+    # on the worker thread, not delivered as signals, so that a flood of
+    # reports can be coalesced before it reaches the GUI
     finished = Signal(bool, str, str)
 
-    def __init__(self, url, folder_path, custom_filename=None):
+    def __init__(self, url, folder_path, on_progress=None, on_transfer=None, **options):
+        # The pipeline loads with the first download, not at startup
+        from downloader.pipeline import DownloadTask
+
         super().__init__()
         self.url = url
-        self.folder_path = folder_path
-        self.custom_filename = custom_filename
+        self._cancel_event = threading.Event()
+        self.task = DownloadTask(
+            url,
+            folder_path,
+            on_progress=on_progress,
+            on_transfer=on_transfer,
+            should_cancel=self.is_cancelled,
+            **options,
+        )
+
+    def cancel(self):
+        # Called from the GUI thread; checked between chunks by the stream
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
 
     def download(self):
         try:
-            self.progress.emit(f"{IconProvider.get('search')} Validating image URL...")
-            response = requests.get(self.url, timeout=10, stream=True)
+            save_path, filename = self.task.run()
+            self.finished.emit(True, save_path, filename)
+        except Exception as e:
+            self.finished.emit(False, str(e), "")
 
-            if not response.ok:
-                raise ValueError(
-                    f"HTTP {response.status_code}: Unable to access the URL"
-                )
 
-            content_type = response.headers.get("Content-Type", "")
-            if "image" not in content_type:
-                raise ValueError("This URL does not point to a valid image")
+class AsyncDownloadWorker(QObject):
+    # Same signals as DownloadWorker, but the download runs as a coroutine on
+    # the shared asyncio engine instead of on a QThread of its own. Signals
+    # are emitted from the engine's loop thread and queued to the receivers.
+    finished = Signal(bool, str, str)
 
-            self.progress.emit(f"{IconProvider.get('download')} Downloading image...")
-            image = Image.open(BytesIO(response.content))
-            ext = image.format.lower() if image.format else "png"
+    def __init__(self, url, folder_path, on_progress=None, on_transfer=None, **options):
+        # Deferred so that aiohttp loads with the first asyncio download
+        from downloader.async_engine import AsyncDownloadTask
 
-            # Generate filename
-            if self.custom_filename:
-                # Use custom filename
-                filename = self.custom_filename
-                if not filename.lower().endswith(
-                    (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp")
-                ):
-                    filename += f".{ext}"
-            else:
-                # Better filename generation
-                parsed = urlparse(self.url)
-                original_filename = os.path.basename(parsed.path)
-                filename = None
-                valid_exts = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp")
-                # Only use original filename if it has a valid image extension
-                if (
-                    original_filename
-                    and not original_filename.startswith(".")
-                    and original_filename.lower().endswith(valid_exts)
-                ):
-                    filename = re.sub(r"[^\w\-_\.]", "_", original_filename)
-                    filename = re.sub(
-                        r"_+", "_", filename
-                    )  # Remove multiple underscores
-                    filename = filename.strip("_")
-                # If still no filename, use default
-                if not filename:
-                    filename = f"pixora_image.{ext}"
+        super().__init__()
+        self.url = url
+        self._cancel_event = threading.Event()
+        self.task = AsyncDownloadTask(
+            url,
+            folder_path,
+            on_progress=on_progress,
+            on_transfer=on_transfer,
+            should_cancel=self.is_cancelled,
+            **options,
+        )
 
-            # Ensure unique filename
-            base_name, extension = os.path.splitext(filename)
-            counter = 1
-            save_path = os.path.join(self.folder_path, filename)
-            while os.path.exists(save_path):
-                filename = f"{base_name} ({counter}){extension}"
-                save_path = os.path.join(self.folder_path, filename)
-                counter += 1
+    def cancel(self):
+        self._cancel_event.set()
+        self.task.cancel()
 
-            self.progress.emit(f"{IconProvider.get('save')} Saving image...")
-            image.save(save_path)
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
 
-            self.finished.emit(True, save_path, filename)
+    def start(self, engine):
+        engine.submit(self.task).add_done_callback(self._on_done)
 
-        except Exception as e:
-            self.finished.emit(False, str(e), "")
+    def _on_done(self, future):
+        if future.cancelled():
+            self.finished.emit(False, "Download cancelled", "")
+        elif (error := future.exception()) is not None:
+            self.finished.emit(False, str(error), "")
+        else:
+            save_path, filename = future.result()
+            self.finished.emit(True, save_path, filename)
@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import threading
+import time
+from downloader.pipeline import DownloadTask, REQUEST_TIMEOUT
+from downloader.resume import PartialDownload
+from downloader.streaming import (
+    StreamWriter,
+    NotAnImageError,
+    ImageTooLargeError,
+    CHUNK_SIZE,
+)
+from downloader.preflight import preflight_async
+from downloader.transform import submit_transform
+from downloader.errors import DownloadCancelled
+from downloader.rate_limiter import get_rate_limiter, host_key
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Each in-flight download holds a socket and a .part file open
+FDS_PER_DOWNLOAD = 2
+# Response chunks are collected up to this size and written to disk on the
+# executor, so the loop never waits on the disk
+WRITE_BATCH_BYTES = 256 * 1024
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def raise_fd_limit(needed):
+    # The default soft limit (often 1024) is too low for thousands of
+    # downloads in flight; raise it towards the hard limit when allowed
+    if resource is None:
+        return
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft == resource.RLIM_INFINITY or soft >= needed:
+            return
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def timing_trace_config():
+    # Feeds aiohttp's DNS and connect events into the SpanRecorder passed
+    # as trace_request_ctx; requests without one are not timed
+    def track(name, method):
+        async def callback(session, context, params):
+            if context.trace_request_ctx is not None:
+                getattr(context.trace_request_ctx, method)(name)
+
+        return callback
+
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(track("dns", "start"))
+    config.on_dns_resolvehost_end.append(track("dns", "stop"))
+    config.on_connection_create_start.append(track("connect", "start"))
+    config.on_connection_create_end.append(track("connect", "stop"))
+    return config
+
+
+class AsyncDownloadTask(DownloadTask):
+    # Same pipeline as DownloadTask, but the HTTP exchange runs on the
+    # engine's event loop. Everything that touches the disk or SQLite goes to
+    # the loop's executor: dedup lookups, the .part file and its checkpoint
+    # sidecar, body writes (in batches, with their sniffing and hashing),
+    # conversion and renames.
+    _loop = None
+    _fetching = None
+
+    def cancel(self):
+        # Interrupts a connect, read or retry back-off still waiting; once the
+        # bytes are in, the save goes ahead just like on the threaded path
+        if self._loop is not None and self._fetching is not None:
+            self._loop.call_soon_threadsafe(self._fetching.cancel)
+
+    async def run_async(self, session):
+        started = time.monotonic()
+        try:
+            saved = await self.download_async(session)
+        except BaseException as e:
+            self.log_result(started, error=e)
+            raise
+        self.log_result(started, saved=saved)
+        return saved
+
+    async def download_async(self, session):
+        loop = self._loop = asyncio.get_running_loop()
+        if known := await loop.run_in_executor(None, self.before_fetch):
+            return known
+        cache_entry = await loop.run_in_executor(None, self.cached_entry)
+        while True:
+            self.attempts += 1
+            partial = await loop.run_in_executor(
+                None, PartialDownload, self.folder_path, self.url
+            )
+            try:
+                ext = await self.interruptible(
+                    self.fetch_async(session, partial, cache_entry)
+                )
+                break
+            except Exception as e:
+                if (delay := self.retry_delay(e)) is None:
+                    raise
+            await self.interruptible(asyncio.sleep(delay))
+        transformed = await self.transform_async(partial, ext)
+        with self.timings.span("save"):
+            return await loop.run_in_executor(
+                None, self.complete, partial, ext, cache_entry, transformed
+            )
+
+    async def transform_async(self, partial, ext):
+        # Awaits the process pool instead of parking an executor thread on it
+        if (kwargs := self.transform_kwargs(ext)) is None:
+            return None
+        try:
+            future = submit_transform(partial.path, self.folder_path, **kwargs)
+            with self.timings.span("transform"):
+                return await self.interruptible(asyncio.wrap_future(future))
+        except BaseException:
+            await self._loop.run_in_executor(None, partial.discard)
+            raise
+
+    async def interruptible(self, awaitable):
+        # Network waits and retry back-off can be cut short by cancel()
+        if self.is_cancelled():
+            raise DownloadCancelled()
+        self._fetching = asyncio.ensure_future(awaitable)
+        try:
+            return await self._fetching
+        except asyncio.CancelledError:
+            raise DownloadCancelled()
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Request timed out after {REQUEST_TIMEOUT}s")
+        finally:
+            self._fetching = None
+
+    async def fetch_async(self, session, partial, cache_entry=None):
+        hasher = hashlib.sha256()
+        try:
+            self.timings.start("wait")
+            async with get_rate_limiter().slot_async(host_key(self.url)):
+                self.timings.stop("wait")
+                if self.needs_preflight(partial, cache_entry):
+                    with self.timings.span("preflight"):
+                        await preflight_async(
+                            session, self.url, self.max_image_bytes, self.timings
+                        )
+                    self.preflighted = True
+                ext = await self.stream_async(session, partial, cache_entry, hasher)
+        except (NotAnImageError, ImageTooLargeError):
+            await self._loop.run_in_executor(None, partial.discard)
+            raise
+        except BaseException:
+            await self._loop.run_in_executor(None, partial.release)
+            raise
+        if ext is None:
+            await self._loop.run_in_executor(None, partial.release)
+            return None
+        self.content_hash = hasher.hexdigest()
+        self.size = partial.offset
+        return ext
+
+    async def stream_async(self, session, partial, cache_entry, hasher):
+        loop = asyncio.get_running_loop()
+        with self.timings.span("ttfb"):
+            response = await self.open_response_async(session, partial, cache_entry)
+        try:
+            # Records the validators in the .part sidecar, off the loop
+            if not await loop.run_in_executor(
+                None,
+                self.check_response,
+                response.status,
+                response.headers,
+                partial,
+                cache_entry,
+            ):
+                return None
+            # Resuming re-hashes the bytes already on disk, keep that off
+            # the loop
+            writer = await loop.run_in_executor(
+                None,
+                StreamWriter,
+                partial.path,
+                partial.offset,
+                partial.checkpoint,
+                hasher,
+                self.max_image_bytes,
+                self.timings,
+                self.transfer,
+            )
+            self.timings.start("transfer")
+            try:
+                await self.write_body(response, writer)
+            except BaseException:
+                await loop.run_in_executor(None, writer.close)
+                raise
+            finally:
+                self.timings.stop("transfer")
+            return await loop.run_in_executor(None, writer.finish)
+        finally:
+            response.release()
+
+    async def write_body(self, response, writer):
+        loop = asyncio.get_running_loop()
+        buffer = bytearray()
+        pending = None
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                if self.is_cancelled():
+                    raise DownloadCancelled()
+                buffer += chunk
+                if len(buffer) >= WRITE_BATCH_BYTES:
+                    pending = loop.run_in_executor(None, writer.write, bytes(buffer))
+                    buffer.clear()
+                    # Shielded so that a cancel cannot orphan a running write
+                    await asyncio.shield(pending)
+            if buffer:
+                pending = loop.run_in_executor(None, writer.write, bytes(buffer))
+                await asyncio.shield(pending)
+        except BaseException:
+            # The caller closes the file next, which must not race the write
+            if pending is not None and not pending.done():
+                await asyncio.wait({pending})
+            raise
+
+    async def open_response_async(self, session, partial, cache_entry=None):
+        headers = self.request_headers(partial, cache_entry)
+        response = await session.get(
+            self.url, headers=headers, trace_request_ctx=self.timings
+        )
+        if not partial.accepts(response.status, response.headers):
+            response.release()
+            partial.reset()
+            response = await session.get(self.url, trace_request_ctx=self.timings)
+        return response
+
+
+class AsyncDownloadEngine:
+    # One event loop on a daemon thread drives every download, so thousands
+    # of requests in flight cost sockets rather than OS threads. Jobs are
+    # handed over with submit() from any thread.
+    def __init__(self):
+        if aiohttp is None:
+            raise RuntimeError("The asyncio engine requires the aiohttp package")
+        self.loop = asyncio.new_event_loop()
+        self._session = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="pixora-async-engine", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._open_session())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _open_session(self):
+        # The download queue decides how many jobs run at once, so the
+        # connector itself is unbounded and only pools keep-alive sockets
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=timeout, trace_configs=[timing_trace_config()]
+        )
+
+    def reserve(self, max_in_flight):
+        raise_fd_limit(max_in_flight * FDS_PER_DOWNLOAD + 256)
+
+    def submit(self, task):
+        # Returns a concurrent.futures.Future resolved on the loop thread
+        return asyncio.run_coroutine_threadsafe(
+            task.run_async(self._session), self.loop
+        )
+
+    def shutdown(self):
+        if not self.loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self._session.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def get_async_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncDownloadEngine()
+        return _engine
+
+
+def shutdown_async_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown()
+            _engine = None
@@ -0,0 +1,73 @@
+import csv
+import re
+import sys
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Bare hosts such as "cdn.example.com/a.png" are accepted and given https
+BARE_HOST_RE = re.compile(r"^[\w-]+(\.[\w-]+)+(:\d+)?(/|$)")
+
+
+def normalize_url(url):
+    url = url.strip().strip("\"'<>")
+    if not url or url.startswith("#"):
+        return None
+    if "://" not in url:
+        if not BARE_HOST_RE.match(url):
+            return None
+        url = f"https://{url}"
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if ":" in netloc:
+        # hostname drops the brackets of an IPv6 literal
+        netloc = f"[{netloc}]"
+    if parts.username or parts.password:
+        userinfo = parts.username or ""
+        if parts.password:
+            userinfo += f":{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc += f":{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def parse_urls(text):
+    # Each line may be a plain URL, several whitespace separated URLs or a CSV
+    # row; anything that does not normalize to an http(s) URL is ignored
+    for row in csv.reader(text.splitlines()):
+        for cell in row:
+            for token in cell.split():
+                if url := normalize_url(token):
+                    yield url
+
+
+def dedupe_urls(urls):
+    seen = set()
+    unique = []
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            unique.append(url)
+    return unique
+
+
+def read_url_text(path):
+    if path == "-":
+        return sys.stdin.read()
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        return f.read()
+
+
+def load_urls(text):
+    return dedupe_urls(parse_urls(text))
+
+
+def load_url_file(path):
+    return load_urls(read_url_text(path))
@@ -0,0 +1,13 @@
+OUTPUT_FORMATS = {
+    "png": "PNG",
+    "jpeg": "JPEG",
+    "webp": "WEBP",
+    "bmp": "BMP",
+    "gif": "GIF",
+}
+# Formats that cannot store an alpha channel or palette as-is
+RGB_ONLY_FORMATS = ("jpeg", "bmp")
+
+
+def needs_conversion(source_format, output_format):
+    return bool(output_format) and output_format != source_format
@@ -0,0 +1,95 @@
+import os
+import threading
+from downloader.storage import data_path, open_database
+
+DEDUP_OFF = "off"
+DEDUP_HARDLINK = "hardlink"
+DEDUP_SKIP = "skip"
+DEDUP_MODES = (DEDUP_HARDLINK, DEDUP_SKIP, DEDUP_OFF)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class DedupStore:
+    # Content hash -> saved file, plus URL -> content hash so a URL that was
+    # fetched before can be served without touching the network
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = open_database(path or data_path("dedup.sqlite3"))
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "hash TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                "url TEXT PRIMARY KEY, hash TEXT NOT NULL)"
+            )
+
+    def find_by_hash(self, content_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        path, size = row
+        try:
+            if os.path.getsize(path) == size:
+                return path
+        except OSError:
+            pass
+        # The file was moved, deleted or edited since it was indexed
+        self.forget(content_hash)
+        return None
+
+    def find_by_url(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], self.find_by_hash(row[0])
+
+    def record(self, content_hash, path, size, url=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (hash, path, size) VALUES (?, ?, ?)",
+                (content_hash, os.path.abspath(path), size),
+            )
+            if url:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)",
+                    (url, content_hash),
+                )
+
+    def forget(self, content_hash):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM blobs WHERE hash = ?", (content_hash,))
+
+
+def get_dedup_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DedupStore()
+        return _store
+
+
+def try_hardlink(source_path, target_path):
+    # Hardlinks need the same filesystem and a filesystem that supports them.
+    # The link is made under a temp name and moved over target_path, which
+    # may be a placeholder claimed by the filename allocator.
+    temp_path = f"{target_path}.pixora-link"
+    try:
+        os.link(source_path, temp_path)
+        os.replace(temp_path, target_path)
+        return True
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,21 @@
+import importlib.util
+
+# Engine choices live apart from async_engine so that picking and validating
+# an engine does not import aiohttp and the whole download pipeline; those
+# load with the first download that needs them.
+ENGINE_THREADED = "threaded"
+ENGINE_ASYNCIO = "asyncio"
+DOWNLOAD_ENGINES = (ENGINE_THREADED, ENGINE_ASYNCIO)
+
+DEFAULT_MAX_IN_FLIGHT = 256
+MAX_IN_FLIGHT_LIMIT = 4096
+
+
+def async_engine_available():
+    return importlib.util.find_spec("aiohttp") is not None
+
+
+def resolve_engine(engine):
+    if engine == ENGINE_ASYNCIO and async_engine_available():
+        return ENGINE_ASYNCIO
+    return ENGINE_THREADED
@@ -0,0 +1,3 @@
+class DownloadCancelled(Exception):
+    def __init__(self, message="Download cancelled"):
+        super().__init__(message)
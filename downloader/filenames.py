@@ -0,0 +1,112 @@
+import os
+import re
+import time
+import threading
+
+SUFFIX_RE = re.compile(r"^(?P<base>.*) \((?P<counter>\d+)\)$")
+# Our own downloads keep touching the folder, so a changed mtime only forces
+# a rescan once the index is this old
+INDEX_MAX_AGE_SECONDS = 30
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+class FilenameAllocator:
+    # Keeps the next free "name (n).ext" suffix per folder and base name, so
+    # picking a unique name costs one O_EXCL create instead of an
+    # os.path.exists probe per existing copy. O_EXCL also makes the claim
+    # safe between worker threads and between Pixora processes.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._folders = {}
+
+    def _folder_index(self, folder_path):
+        # Rebuilt from a single directory scan when the folder changed since
+        # the last one (files added or deleted outside Pixora), at most once
+        # per INDEX_MAX_AGE_SECONDS, and straight away after a collision
+        mtime = _folder_mtime(folder_path)
+        cached = self._folders.get(folder_path)
+        if cached is not None:
+            scanned_at, scanned_mtime, index = cached
+            fresh = time.monotonic() - scanned_at < INDEX_MAX_AGE_SECONDS
+            if scanned_mtime == mtime or fresh:
+                return index
+        index = {}
+        try:
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    base, ext = os.path.splitext(entry.name)
+                    counter = 0
+                    if match := SUFFIX_RE.match(base):
+                        base, counter = match["base"], int(match["counter"])
+                    key = _index_key(base, ext)
+                    index[key] = max(index.get(key, 0), counter + 1)
+        except OSError:
+            pass
+        self._folders[folder_path] = (time.monotonic(), mtime, index)
+        return index
+
+    def _forget(self, folder_path):
+        with self._lock:
+            self._folders.pop(folder_path, None)
+
+    def _reserve(self, folder_path, key, at_least=0):
+        with self._lock:
+            index = self._folder_index(folder_path)
+            counter = max(index.get(key, 0), at_least)
+            index[key] = counter + 1
+            return counter
+
+    def claim(self, folder_path, filename):
+        folder_path = os.path.abspath(folder_path)
+        base, ext = os.path.splitext(filename)
+        key = _index_key(base, ext)
+        counter = -1
+        while True:
+            # Always past the last candidate, even if a rescan missed it
+            counter = self._reserve(folder_path, key, counter + 1)
+            candidate = f"{base} ({counter}){ext}" if counter else filename
+            path = os.path.join(folder_path, candidate)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            except FileExistsError:
+                # Created behind our back (another process, or a file copied
+                # in since the last scan), so the index is stale
+                self._forget(folder_path)
+                continue
+            os.close(fd)
+            return path, candidate
+
+
+def _index_key(base, ext):
+    # Case-insensitive filesystems treat PHOTO.jpg and photo.jpg as one file
+    return os.path.normcase(base).casefold(), ext.casefold()
+
+
+def _folder_mtime(folder_path):
+    try:
+        return os.stat(folder_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_filename_allocator():
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = FilenameAllocator()
+        return _allocator
+
+
+def claim_filename(folder_path, filename):
+    # Returns (path, filename) of an empty placeholder file that the caller
+    # now owns and must either replace with the real image or release
+    return get_filename_allocator().claim(folder_path, filename)
+
+
+def release_filename(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
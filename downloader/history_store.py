@@ -0,0 +1,193 @@
+import os
+import time
+import atexit
+import threading
+from downloader.storage import data_path, open_database
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# Finished downloads are buffered and written in one transaction, so a
+# batch run costs one commit per interval instead of one per image
+FLUSH_INTERVAL = 0.5
+MAX_BUFFERED = 1000
+DEFAULT_PAGE_SIZE = 200
+
+COLUMNS = (
+    "id",
+    "url",
+    "path",
+    "size",
+    "content_hash",
+    "duration",
+    "status",
+    "outcome",
+    "attempts",
+    "error",
+    "finished_at",
+)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class HistoryStore:
+    # Every finished download, successful or not, with indexes on URL, content
+    # hash and time so "was this downloaded before?" is a B-tree lookup
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._timer = None
+        self._conn = open_database(path or data_path("history.sqlite3"))
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                "id INTEGER PRIMARY KEY, url TEXT NOT NULL, path TEXT, "
+                "size INTEGER, content_hash TEXT, duration REAL, "
+                "status TEXT NOT NULL, outcome TEXT, attempts INTEGER, "
+                "error TEXT, finished_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS downloads_url ON downloads (url)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS downloads_hash ON downloads (content_hash)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS downloads_time ON downloads (finished_at)"
+            )
+
+    def record(
+        self,
+        url,
+        status,
+        path=None,
+        size=None,
+        content_hash=None,
+        duration=None,
+        outcome=None,
+        attempts=None,
+        error=None,
+        finished_at=None,
+    ):
+        # Only appends to the buffer, so it is safe to call from the asyncio
+        # engine's loop thread; the write happens on a timer thread
+        row = (
+            url,
+            os.path.abspath(path) if path else None,
+            size,
+            content_hash,
+            duration,
+            status,
+            outcome,
+            attempts,
+            error,
+            finished_at or time.time(),
+        )
+        with self._lock:
+            self._buffer.append(row)
+            overflow = len(self._buffer) >= MAX_BUFFERED
+            if not overflow and self._timer is None:
+                self._timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if overflow:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO downloads ({', '.join(COLUMNS[1:])}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _query(self, sql, params=()):
+        # Reads see buffered records too
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def was_downloaded(self, url):
+        # The latest successful download of url whose file still exists
+        for entry in self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM downloads "
+            "WHERE url = ? AND status = ? ORDER BY id DESC LIMIT 5",
+            (url, STATUS_OK),
+        ):
+            if entry["path"] and os.path.exists(entry["path"]):
+                return entry
+        return None
+
+    def find_by_hash(self, content_hash, limit=100):
+        return self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM downloads "
+            "WHERE content_hash = ? ORDER BY id DESC LIMIT ?",
+            (content_hash, limit),
+        )
+
+    def page(self, before_id=None, limit=DEFAULT_PAGE_SIZE, status=None):
+        # Newest first; pass the smallest id of the previous page to get the
+        # next older one (keyset paging stays O(log n) at any depth)
+        where, params = [], []
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(before_id)
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        return self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM downloads {clause}"
+            "ORDER BY id DESC LIMIT ?",
+            (*params, limit),
+        )
+
+    def since(self, timestamp, limit=DEFAULT_PAGE_SIZE):
+        return self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM downloads "
+            "WHERE finished_at >= ? ORDER BY finished_at DESC LIMIT ?",
+            (timestamp, limit),
+        )
+
+    def stats(self):
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*), COALESCE(SUM(size), 0) "
+                "FROM downloads GROUP BY status"
+            ).fetchall()
+        stats = {"entries": 0, "bytes": 0}
+        for status, count, size in rows:
+            stats[status] = count
+            stats["entries"] += count
+            stats["bytes"] += size
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.execute("DELETE FROM downloads")
+
+
+def get_history_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+            # The flush timer is a daemon thread, so write what is left on exit
+            atexit.register(_store.flush)
+        return _store
@@ -0,0 +1,156 @@
+import os
+import time
+import threading
+from downloader.storage import data_path, open_database
+
+DEFAULT_MAX_ENTRIES = 50000
+# Total size of the files the cache points at, not of the cache itself
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+_limits = {"max_entries": DEFAULT_MAX_ENTRIES, "max_bytes": DEFAULT_MAX_BYTES}
+
+COLUMNS = ("url", "etag", "last_modified", "path", "size", "content_hash", "last_used")
+
+
+class HttpCache:
+    # Validators (ETag / Last-Modified) and the saved location per URL, so a
+    # repeat download can be a conditional GET answered with 304 Not Modified.
+    # Evicting an entry only forgets the metadata; saved images are untouched.
+    def __init__(
+        self, path=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = open_database(path or data_path("http_cache.sqlite3"))
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "path TEXT NOT NULL, size INTEGER NOT NULL, content_hash TEXT, "
+                "last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+            )
+
+    def set_limits(self, max_entries=None, max_bytes=None):
+        if max_entries is not None:
+            self.max_entries = max(1, int(max_entries))
+        if max_bytes is not None:
+            self.max_bytes = max(1, int(max_bytes))
+        self.evict()
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(COLUMNS, row))
+        try:
+            if os.path.getsize(entry["path"]) == entry["size"]:
+                return entry
+        except OSError:
+            pass
+        # The local copy is gone or changed, so a 304 could not be served
+        self.forget(url)
+        return None
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, etag, last_modified, path, size, content_hash=None):
+        if not (etag or last_modified):
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                f"({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    os.path.abspath(path),
+                    size,
+                    content_hash,
+                    time.time(),
+                ),
+            )
+        self.evict()
+
+    def touch(self, url):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def forget(self, url):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def evict(self):
+        # Least recently used entries go first, by count and by total size
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM entries WHERE url IN ("
+                "SELECT url FROM entries ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.execute(
+                "DELETE FROM entries WHERE url IN ("
+                "SELECT url FROM (SELECT url, SUM(size) OVER "
+                "(ORDER BY last_used DESC, url) AS running FROM entries) "
+                "WHERE running > ?)",
+                (self.max_bytes,),
+            )
+
+    def stats(self):
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def entries(self, limit=100):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM entries "
+                "ORDER BY last_used DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def configure_http_cache(max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+    with _cache_lock:
+        _limits.update(max_entries=max_entries, max_bytes=max_bytes)
+        cache = _cache
+    if cache is not None:
+        cache.set_limits(max_entries, max_bytes)
+
+
+def get_http_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(**_limits)
+        return _cache
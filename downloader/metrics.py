@@ -0,0 +1,191 @@
+import csv
+import math
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Per-download phases, in pipeline order. dns and connect (which includes
+# dns) are only known for the asyncio engine through aiohttp tracing;
+# requests only reports ttfb, the time to the response headers.
+SPANS = (
+    "wait",
+    "preflight",
+    "dns",
+    "connect",
+    "ttfb",
+    "transfer",
+    "write",
+    "decode",
+    "transform",
+    "save",
+    "total",
+)
+DEFAULT_WINDOW = 1000
+THROUGHPUT_SECONDS = 10
+
+CSV_COLUMNS = ("finished_at", "url", "ok", "bytes", "attempts", "error") + SPANS
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def percentile(values, fraction):
+    # Nearest rank on an already sorted list
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[rank]
+
+
+class SpanRecorder:
+    # Seconds per phase for one download; a phase entered several times
+    # (retries, one write per chunk) accumulates
+    def __init__(self, collector=None):
+        self.spans = {}
+        self._starts = {}
+        self.collector = collector or get_metrics()
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def start(self, name):
+        self._starts[name] = time.perf_counter()
+
+    def stop(self, name):
+        if (started := self._starts.pop(name, None)) is not None:
+            self.add(name, time.perf_counter() - started)
+
+    def count_bytes(self, count):
+        self.collector.add_bytes(count)
+
+
+class MetricsCollector:
+    # Rolling stats over the last `window` finished downloads, plus bytes
+    # per second over the last few seconds counted as chunks arrive, so a
+    # single large download shows up before it completes
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=window)
+        # [second, bytes] buckets, newest last
+        self._buckets = deque()
+        self.started_at = time.time()
+        self.completed = 0
+        self.failed = 0
+        self.total_bytes = 0
+        self.queued = 0
+        self.active = 0
+
+    def add_bytes(self, count):
+        second = int(time.monotonic())
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] == second:
+                self._buckets[-1][1] += count
+            else:
+                self._buckets.append([second, count])
+                self._trim(second)
+            self.total_bytes += count
+
+    def _trim(self, now):
+        # Keeps the current second plus THROUGHPUT_SECONDS complete ones
+        while self._buckets and self._buckets[0][0] < now - THROUGHPUT_SECONDS:
+            self._buckets.popleft()
+
+    def set_queue_depth(self, queued, active):
+        self.queued, self.active = queued, active
+
+    def record(self, url, ok, size, spans, attempts=1, error=None):
+        entry = {
+            "finished_at": time.time(),
+            "url": url,
+            "ok": ok,
+            "bytes": size or 0,
+            "attempts": attempts,
+            "error": error,
+            **{name: round(seconds, 6) for name, seconds in spans.items()},
+        }
+        with self._lock:
+            self._records.append(entry)
+            self.completed += 1
+            self.failed += not ok
+
+    def bytes_per_second(self):
+        now = int(time.monotonic())
+        with self._lock:
+            self._trim(now)
+            total = sum(count for second, count in self._buckets if second < now)
+        return total / THROUGHPUT_SECONDS
+
+    def snapshot(self):
+        with self._lock:
+            records = list(self._records)
+            stats = {
+                "completed": self.completed,
+                "failed": self.failed,
+                "bytes": self.total_bytes,
+                "queued": self.queued,
+                "active": self.active,
+                "uptime": round(time.time() - self.started_at, 3),
+            }
+        # "recent" covers the last THROUGHPUT_SECONDS and reads 0 once idle;
+        # "run" averages every byte over the time since the collector started
+        stats["recent_mb_per_s"] = round(self.bytes_per_second() / (1024 * 1024), 3)
+        elapsed = stats["uptime"]
+        stats["run_mb_per_s"] = (
+            round(stats["bytes"] / (1024 * 1024) / elapsed, 3) if elapsed else 0.0
+        )
+        stats["window"] = len(records)
+        ok = [record for record in records if record["ok"]]
+        for name in ("total", "ttfb", "transfer", "transform"):
+            values = sorted(record[name] for record in ok if name in record)
+            stats[f"{name}_p50"] = percentile(values, 0.50)
+            stats[f"{name}_p95"] = percentile(values, 0.95)
+        return stats
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def export(self, path):
+        # Format from the extension: .csv gets one row per download, anything
+        # else a JSON document with the summary and the rows
+        if str(path).lower().endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(
+                {"summary": self.snapshot(), "downloads": self.records()}, f, indent=1
+            )
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.records())
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._buckets.clear()
+            self.started_at = time.time()
+            self.completed = self.failed = self.total_bytes = 0
+
+
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsCollector()
+        return _metrics
@@ -0,0 +1,526 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+from urllib.parse import urlparse
+from icon_provider import IconProvider
+from downloader.streaming import (
+    stream_to_file,
+    commit_temp_file,
+    discard_temp_file,
+    NotAnImageError,
+    ImageTooLargeError,
+)
+from downloader.preflight import (
+    preflight,
+    declared_size,
+    check_size,
+    DEFAULT_MAX_IMAGE_BYTES,
+)
+from downloader.resume import PartialDownload
+from downloader.transform import needs_transform, submit_transform, wait_for
+from downloader.dedup_store import (
+    get_dedup_store,
+    try_hardlink,
+    DEDUP_HARDLINK,
+    DEDUP_SKIP,
+    DEDUP_OFF,
+)
+from downloader.http_cache import get_http_cache
+from downloader.history_store import (
+    get_history_store,
+    STATUS_OK,
+    STATUS_FAILED,
+    STATUS_CANCELLED,
+)
+from downloader.filenames import claim_filename, release_filename
+from downloader.errors import DownloadCancelled
+from downloader.session import get_session
+from downloader.rate_limiter import (
+    get_rate_limiter,
+    host_key,
+    parse_retry_after,
+    CANCEL_POLL_INTERVAL,
+)
+from downloader.retry import get_retry_policy, HTTPStatusError
+from downloader.metrics import SpanRecorder, get_metrics
+from downloader.progress import TransferProgress
+
+VALID_EXTS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp")
+# Extensions that name the same format as another spelling
+EXT_ALIASES = {"jpg": "jpeg"}
+REQUEST_TIMEOUT = 10
+
+OUTCOME_DOWNLOADED = "downloaded"
+OUTCOME_LINKED = "linked"
+OUTCOME_SKIPPED = "skipped"
+OUTCOME_COPIED = "copied"
+
+
+def with_image_extension(filename, ext):
+    # The sniffed (or converted) format decides the extension: bytes are
+    # saved as served, so a PNG behind "photo.jpg" must not keep ".jpg"
+    base, name_ext = os.path.splitext(filename)
+    if name_ext.lower() not in VALID_EXTS:
+        return f"{filename}.{ext}"
+    if image_format_of(name_ext) == image_format_of(ext):
+        return filename
+    return f"{base}.{ext}"
+
+
+def image_format_of(ext):
+    ext = ext.lower().lstrip(".")
+    return EXT_ALIASES.get(ext, ext)
+
+
+class DownloadTask:
+    # Qt-free download logic shared by DownloadWorker and the CLI; progress
+    # and cancellation are plain callables so no event loop is required
+    def __init__(
+        self,
+        url,
+        folder_path,
+        custom_filename=None,
+        output_format=None,
+        dedup_mode=DEDUP_HARDLINK,
+        skip_known_urls=False,
+        use_http_cache=True,
+        use_preflight=True,
+        max_image_bytes=DEFAULT_MAX_IMAGE_BYTES,
+        record_history=True,
+        max_dimension=0,
+        strip_metadata=False,
+        quality=None,
+        on_progress=None,
+        on_transfer=None,
+        should_cancel=None,
+    ):
+        self.url = url
+        self.folder_path = folder_path
+        self.custom_filename = custom_filename
+        self.output_format = output_format or None
+        self.dedup_mode = dedup_mode or DEDUP_OFF
+        self.skip_known_urls = skip_known_urls
+        self.use_http_cache = use_http_cache
+        self.use_preflight = use_preflight
+        # 0 means no size limit
+        self.max_image_bytes = max_image_bytes or 0
+        self.record_history = record_history
+        # Post-download transform, applied in a process pool; 0/None is off
+        self.max_dimension = max_dimension or 0
+        self.strip_metadata = strip_metadata
+        self.quality = quality
+        self.on_progress = on_progress
+        # Called with TransferProgress snapshots while the body downloads
+        self.on_transfer = on_transfer
+        self.transfer = None
+        self.should_cancel = should_cancel
+        self.retry_policy = get_retry_policy()
+        self.content_hash = None
+        self.transformed = False
+        self.size = 0
+        self.outcome = None
+        self.attempts = 0
+        self.preflighted = False
+        self.timings = SpanRecorder()
+
+    def report(self, message):
+        if self.on_progress:
+            self.on_progress(message)
+
+    def track_transfer(self, offset, total):
+        self.transfer = None
+        if self.on_transfer:
+            self.transfer = TransferProgress(self.on_transfer, offset, total)
+
+    def is_cancelled(self):
+        return bool(self.should_cancel and self.should_cancel())
+
+    def uses_dedup_store(self):
+        return self.dedup_mode != DEDUP_OFF or self.skip_known_urls
+
+    def transforms(self):
+        return bool(
+            self.output_format
+            or self.max_dimension
+            or self.strip_metadata
+            or self.quality is not None
+        )
+
+    def saved_hash(self):
+        # content_hash describes the served bytes, which a converted copy no
+        # longer matches
+        return None if self.transformed else self.content_hash
+
+    def needs_preflight(self, partial, cache_entry):
+        # A resume or a conditional GET has been validated before, and the
+        # probe would cost as much as the 206/304 it is meant to spare
+        return (
+            self.use_preflight
+            and not self.preflighted
+            and not partial.offset
+            and not cache_entry
+        )
+
+    def wait(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self.is_cancelled():
+            if (remaining := deadline - time.monotonic()) <= 0:
+                return
+            time.sleep(min(remaining, CANCEL_POLL_INTERVAL))
+        raise DownloadCancelled()
+
+    def retry_delay(self, error):
+        # Reports the retry and returns how long to wait, or None to give up
+        delay = self.retry_policy.next_delay(self.attempts, error)
+        if delay is not None:
+            self.report(
+                f"{IconProvider.get('auto')} {error} - retrying in "
+                f"{delay:.1f}s (attempt {self.attempts + 1} of "
+                f"{self.retry_policy.max_attempts})"
+            )
+        return delay
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            saved = self.download()
+        except BaseException as e:
+            self.log_result(started, error=e)
+            raise
+        self.log_result(started, saved=saved)
+        return saved
+
+    def log_result(self, started, saved=None, error=None):
+        duration = time.monotonic() - started
+        self.timings.add("total", duration)
+        get_metrics().record(
+            self.url,
+            error is None,
+            self.size,
+            self.timings.spans,
+            attempts=self.attempts,
+            error=None if error is None else str(error),
+        )
+        self.log_history(duration, saved, error)
+
+    def log_history(self, duration, saved=None, error=None):
+        if not self.record_history:
+            return
+        if error is None:
+            status, path, error = STATUS_OK, saved[0], None
+        else:
+            cancelled = isinstance(error, (DownloadCancelled, KeyboardInterrupt))
+            status = STATUS_CANCELLED if cancelled else STATUS_FAILED
+            path, error = None, str(error)
+        get_history_store().record(
+            self.url,
+            status,
+            path=path,
+            size=self.size if status == STATUS_OK else None,
+            content_hash=self.saved_hash(),
+            duration=duration,
+            outcome=self.outcome,
+            attempts=self.attempts,
+            error=error,
+        )
+
+    def download(self):
+        if known := self.before_fetch():
+            return known
+        cache_entry = self.cached_entry()
+        while True:
+            self.attempts += 1
+            # A fresh PartialDownload picks up whatever the failed attempt
+            # left in the .part file, so a retry resumes instead of restarting
+            partial = PartialDownload(self.folder_path, self.url)
+            try:
+                ext = self.fetch(partial, cache_entry)
+                break
+            except Exception as e:
+                if (delay := self.retry_delay(e)) is None:
+                    raise
+            self.wait(delay)
+        transformed = self.transform(partial, ext)
+        with self.timings.span("save"):
+            return self.complete(partial, ext, cache_entry, transformed)
+
+    def before_fetch(self):
+        if self.is_cancelled():
+            raise DownloadCancelled()
+        # A transformed copy cannot be produced from the cached original's link
+        if (
+            self.skip_known_urls
+            and not self.transforms()
+            and (known := self.reuse_known_url())
+        ):
+            return known
+        self.report(f"{IconProvider.get('search')} Validating image URL...")
+        return None
+
+    def transform_kwargs(self, ext):
+        # None when the downloaded bytes are kept exactly as served
+        if ext is None or not needs_transform(
+            ext,
+            self.output_format,
+            self.max_dimension,
+            self.strip_metadata,
+            self.quality,
+        ):
+            return None
+        steps = [f"to {(self.output_format or ext).upper()}"]
+        if self.max_dimension:
+            steps.append(f"max {self.max_dimension}px")
+        if self.quality is not None:
+            steps.append(f"quality {self.quality}")
+        if self.strip_metadata:
+            steps.append("no metadata")
+        self.report(f"{IconProvider.get('image')} Converting {', '.join(steps)}...")
+        return {
+            "output_format": self.output_format,
+            "max_dimension": self.max_dimension,
+            "strip_metadata": self.strip_metadata,
+            "quality": self.quality,
+        }
+
+    def transform(self, partial, ext):
+        # Returns (temp path, ext) of the transformed copy, or None. Decoding
+        # and encoding run in the transform process pool, so they never hold
+        # the GIL that other downloads' network threads need.
+        if (kwargs := self.transform_kwargs(ext)) is None:
+            return None
+        try:
+            future = submit_transform(partial.path, self.folder_path, **kwargs)
+            with self.timings.span("transform"):
+                return wait_for(future, self.is_cancelled)
+        except BaseException:
+            partial.discard()
+            raise
+
+    def complete(self, partial, ext, cache_entry, transformed=None):
+        if ext is None:
+            # 304 Not Modified: the copy saved last time is still current
+            get_http_cache().touch(self.url)
+            self.report(f"{IconProvider.get('check')} Image unchanged since last time")
+            self.content_hash = cache_entry["content_hash"]
+            return self.reuse_local_file(cache_entry["path"])
+
+        temp_path = partial.path
+        save_path = None
+        try:
+            duplicate_path = None
+            # Bytes are kept exactly as served unless a transform was
+            # explicitly requested in settings
+            if transformed:
+                discard_temp_file(temp_path)
+                temp_path, ext = transformed
+                self.transformed = True
+            elif self.dedup_mode != DEDUP_OFF:
+                duplicate_path = get_dedup_store().find_by_hash(self.content_hash)
+
+            if duplicate_path and self.dedup_mode == DEDUP_SKIP:
+                discard_temp_file(temp_path)
+                partial.finish()
+                get_dedup_store().record(
+                    self.content_hash, duplicate_path, self.size, self.url
+                )
+                self.outcome = OUTCOME_SKIPPED
+                return duplicate_path, os.path.basename(duplicate_path)
+
+            filename = self.build_filename(ext)
+            save_path, filename = claim_filename(self.folder_path, filename)
+
+            self.report(f"{IconProvider.get('save')} Saving image...")
+            if duplicate_path and try_hardlink(duplicate_path, save_path):
+                discard_temp_file(temp_path)
+                self.outcome = OUTCOME_LINKED
+            else:
+                commit_temp_file(temp_path, save_path)
+                self.outcome = OUTCOME_DOWNLOADED
+        except BaseException:
+            discard_temp_file(temp_path)
+            partial.discard()
+            if save_path:
+                release_filename(save_path)
+            raise
+
+        partial.finish()
+        # Converted output no longer matches the hash of the served bytes
+        if temp_path == partial.path:
+            stored_path = duplicate_path or save_path
+            if self.uses_dedup_store():
+                get_dedup_store().record(
+                    self.content_hash, stored_path, self.size, self.url
+                )
+            if self.use_http_cache:
+                get_http_cache().store(
+                    self.url,
+                    partial.etag,
+                    partial.last_modified,
+                    stored_path,
+                    self.size,
+                    self.content_hash,
+                )
+        return save_path, filename
+
+    def fetch(self, partial, cache_entry=None):
+        hasher = hashlib.sha256()
+        host = host_key(self.url)
+        try:
+            # The host slot is held until the body is read, so the per-host
+            # cap limits open connections and not just request starts
+            self.timings.start("wait")
+            with get_rate_limiter().slot(host, self.is_cancelled):
+                self.timings.stop("wait")
+                if self.needs_preflight(partial, cache_entry):
+                    with self.timings.span("preflight"):
+                        preflight(
+                            get_session(),
+                            self.url,
+                            self.max_image_bytes,
+                            REQUEST_TIMEOUT,
+                        )
+                    self.preflighted = True
+                # requests cannot split DNS and connect out of this
+                with self.timings.span("ttfb"):
+                    response = self.open_response(partial, cache_entry)
+                with response:
+                    if not self.check_response(
+                        response.status_code, response.headers, partial, cache_entry
+                    ):
+                        partial.release()
+                        return None
+                    # Chunks go straight to a file in the target folder so
+                    # memory use stays flat regardless of the image size
+                    with self.timings.span("transfer"):
+                        ext = stream_to_file(
+                            response,
+                            partial.path,
+                            resume_from=partial.offset,
+                            should_cancel=self.is_cancelled,
+                            checkpoint=partial.checkpoint,
+                            hasher=hasher,
+                            max_bytes=self.max_image_bytes,
+                            timings=self.timings,
+                            progress=self.transfer,
+                        )
+        except (NotAnImageError, ImageTooLargeError):
+            partial.discard()
+            raise
+        except BaseException:
+            # Timeouts, dropped connections and cancels leave the .part file
+            # behind so the next attempt can continue where this one stopped
+            partial.release()
+            raise
+        self.content_hash = hasher.hexdigest()
+        self.size = partial.offset
+        return ext
+
+    def request_headers(self, partial, cache_entry):
+        # Resuming a .part file takes priority over revalidating a cached copy
+        headers = partial.resume_headers()
+        if not headers and cache_entry:
+            headers = get_http_cache().conditional_headers(cache_entry)
+        return headers
+
+    def check_response(self, status_code, headers, partial, cache_entry):
+        # False means a 304 that lets the cached copy be reused
+        if status_code == 304 and cache_entry:
+            return False
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if status_code == 429 or (status_code == 503 and retry_after is not None):
+            # Later requests to this host wait out the pause in the limiter
+            delay = get_rate_limiter().backoff(host_key(self.url), retry_after)
+            raise HTTPStatusError(
+                status_code,
+                f"HTTP {status_code}: Server asked to slow down, "
+                f"pausing requests to this host for {delay:.0f}s",
+                retry_after=delay,
+            )
+        if status_code >= 400:
+            raise HTTPStatusError(status_code)
+
+        content_type = headers.get("Content-Type", "")
+        if "image" not in content_type:
+            raise NotAnImageError()
+        total = declared_size(status_code, headers)
+        check_size(total, self.max_image_bytes)
+
+        partial.begin(headers)
+        self.track_transfer(partial.offset, total)
+        if partial.offset:
+            self.report(
+                f"{IconProvider.get('download')} Resuming download at "
+                f"{partial.offset // 1024} KB..."
+            )
+        else:
+            self.report(f"{IconProvider.get('download')} Downloading image...")
+        return True
+
+    def cached_entry(self):
+        # Transformed output is never cached, see complete()
+        if not self.use_http_cache or self.transforms():
+            return None
+        return get_http_cache().lookup(self.url)
+
+    def reuse_known_url(self):
+        content_hash, known_path = get_dedup_store().find_by_url(self.url)
+        if not known_path:
+            return None
+        self.content_hash = content_hash
+        self.report(f"{IconProvider.get('save')} Reusing earlier download...")
+        return self.reuse_local_file(known_path)
+
+    def reuse_local_file(self, local_path):
+        self.size = os.path.getsize(local_path)
+        if self.dedup_mode == DEDUP_SKIP:
+            self.outcome = OUTCOME_SKIPPED
+            return local_path, os.path.basename(local_path)
+        ext = os.path.splitext(local_path)[1].lstrip(".")
+        save_path, filename = claim_filename(self.folder_path, self.build_filename(ext))
+        try:
+            if self.dedup_mode == DEDUP_HARDLINK and try_hardlink(
+                local_path, save_path
+            ):
+                self.outcome = OUTCOME_LINKED
+            else:
+                shutil.copyfile(local_path, save_path)
+                self.outcome = OUTCOME_COPIED
+        except BaseException:
+            release_filename(save_path)
+            raise
+        return save_path, filename
+
+    def open_response(self, partial, cache_entry=None):
+        session = get_session()
+        headers = self.request_headers(partial, cache_entry)
+        response = session.get(
+            self.url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True
+        )
+        if not partial.accepts(response.status_code, response.headers):
+            # Range not honoured as asked (wrong offset, 416): fetch it whole
+            response.close()
+            partial.reset()
+            response = session.get(self.url, timeout=REQUEST_TIMEOUT, stream=True)
+        return response
+
+    def build_filename(self, ext):
+        if self.custom_filename:
+            # Use custom filename
+            return with_image_extension(self.custom_filename, ext)
+        # Better filename generation
+        parsed = urlparse(self.url)
+        original_filename = os.path.basename(parsed.path)
+        # Only use original filename if it has a valid image extension
+        if (
+            original_filename
+            and not original_filename.startswith(".")
+            and original_filename.lower().endswith(VALID_EXTS)
+        ):
+            filename = re.sub(r"[^\w\-_\.]", "_", original_filename)
+            filename = re.sub(r"_+", "_", filename)  # Remove multiple underscores
+            if filename := filename.strip("_"):
+                return with_image_extension(filename, ext)
+        # If still no filename, use default
+        return f"pixora_image.{ext}"
@@ -0,0 +1,97 @@
+from downloader.streaming import (
+    sniff_image_format,
+    NotAnImageError,
+    ImageTooLargeError,
+)
+
+DEFAULT_MAX_IMAGE_BYTES = 100 * 1024 * 1024
+# Enough for every signature below and for PIL to read most headers
+PROBE_BYTES = 1024
+PROBE_HEADERS = {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+
+MAGIC_SIGNATURES = (
+    (0, b"\xff\xd8\xff"),  # JPEG
+    (0, b"\x89PNG\r\n\x1a\n"),  # PNG
+    (0, b"GIF87a"),
+    (0, b"GIF89a"),
+    (0, b"BM"),  # BMP
+    (8, b"WEBP"),  # RIFF....WEBP
+    (0, b"II*\x00"),  # TIFF, little-endian
+    (0, b"MM\x00*"),  # TIFF, big-endian
+    (0, b"\x00\x00\x01\x00"),  # ICO
+    (4, b"ftypavif"),
+    (4, b"ftypheic"),
+)
+
+
+def has_image_signature(head):
+    head = bytes(head)
+    if any(head[offset:].startswith(magic) for offset, magic in MAGIC_SIGNATURES):
+        return True
+    # Anything else PIL can identify from the first bytes is accepted too
+    return sniff_image_format(head) is not None
+
+
+def declared_size(status_code, headers):
+    if status_code == 206:
+        # "bytes 0-1023/48213": the total after the slash, "*" if unknown
+        total = headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+def check_size(size, max_bytes):
+    if max_bytes and size is not None and size > max_bytes:
+        raise ImageTooLargeError(size, max_bytes)
+
+
+def check_head(status_code, headers, max_bytes):
+    # True when the HEAD answer settles it; False asks for a Range probe.
+    # Servers that refuse HEAD (405/501) or sign URLs per method (403 on
+    # S3-style links) are common, so any error falls back to the probe.
+    content_type = headers.get("Content-Type", "")
+    if status_code >= 400 or not content_type:
+        return False
+    if "image" not in content_type:
+        raise NotAnImageError()
+    check_size(declared_size(status_code, headers), max_bytes)
+    return True
+
+
+def check_probe(status_code, headers, head, max_bytes):
+    # HTTP errors are left for the real GET, which reports and retries them
+    if status_code >= 400:
+        return
+    if "image" not in headers.get("Content-Type", ""):
+        raise NotAnImageError()
+    check_size(declared_size(status_code, headers), max_bytes)
+    if not has_image_signature(head):
+        raise NotAnImageError()
+
+
+def preflight(session, url, max_bytes, timeout):
+    with session.head(url, allow_redirects=True, timeout=timeout) as response:
+        if check_head(response.status_code, response.headers, max_bytes):
+            return
+    # Streamed so a server that ignores Range only sends PROBE_BYTES before
+    # the connection is dropped
+    with session.get(url, headers=PROBE_HEADERS, timeout=timeout, stream=True) as r:
+        head = r.raw.read(PROBE_BYTES, decode_content=True) if r.ok else b""
+        check_probe(r.status_code, r.headers, head, max_bytes)
+
+
+async def preflight_async(session, url, max_bytes, trace=None):
+    # trace is passed to aiohttp as trace_request_ctx, see timing_trace_config
+    async with session.head(
+        url, allow_redirects=True, trace_request_ctx=trace
+    ) as response:
+        if check_head(response.status, response.headers, max_bytes):
+            return
+    async with session.get(url, headers=PROBE_HEADERS, trace_request_ctx=trace) as r:
+        head = b""
+        while r.status < 400 and len(head) < PROBE_BYTES:
+            if not (chunk := await r.content.read(PROBE_BYTES - len(head))):
+                break
+            head += chunk
+        check_probe(r.status, r.headers, head, max_bytes)
@@ -0,0 +1,28 @@
+import importlib
+import threading
+from downloader.engines import ENGINE_ASYNCIO, resolve_engine
+
+# What the download pipeline imports on first use. Loading it ahead of the
+# first download keeps that cost out of its latency, and keeps concurrent
+# first downloads from queueing on the import lock.
+PIPELINE_MODULES = ("downloader.pipeline", "requests", "PIL.Image")
+ASYNC_MODULES = ("aiohttp", "asyncio", "downloader.async_engine")
+
+
+def preload_download_modules(engine=None):
+    modules = PIPELINE_MODULES
+    if resolve_engine(engine) == ENGINE_ASYNCIO:
+        modules += ASYNC_MODULES
+    for name in modules:
+        importlib.import_module(name)
+
+
+def preload_in_background(engine=None):
+    thread = threading.Thread(
+        target=preload_download_modules,
+        args=(engine,),
+        name="pixora-preload",
+        daemon=True,
+    )
+    thread.start()
+    return thread
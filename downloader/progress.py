@@ -0,0 +1,156 @@
+import math
+import time
+import threading
+from downloader.streaming import format_size
+
+# How often queued progress reports are handed to the GUI
+PROGRESS_FPS = 30
+PROGRESS_INTERVAL_MS = 1000 // PROGRESS_FPS
+# A transfer reports its bytes after this long, or after this share of the
+# total, whichever comes first; in between, a chunk costs a clock read
+TRANSFER_REPORT_SECONDS = 0.25
+TRANSFER_REPORT_FRACTION = 0.01
+# Time constant of the smoothed speed used for the ETA
+SPEED_SMOOTHING_SECONDS = 2.0
+# No bytes for this long and a running transfer is shown as stalled
+STALL_SECONDS = 5
+
+
+def format_duration(seconds):
+    seconds = math.ceil(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds // 60 % 60:02d}m"
+
+
+def transfer_stalled(transfer):
+    return time.monotonic() - transfer["at"] >= STALL_SECONDS
+
+
+def describe_transfer(transfer, short=False):
+    # "1.2 MB of 4.0 MB · 850 KB/s · 3s left", or "42% · 850 KB/s · 3s" short
+    received, total = transfer["received"], transfer["total"]
+    if short and total:
+        parts = [f"{received * 100 // total}%"]
+    elif total:
+        parts = [f"{format_size(received)} of {format_size(total)}"]
+    else:
+        parts = [format_size(received)]
+    if transfer_stalled(transfer):
+        idle = time.monotonic() - transfer["at"]
+        parts.append(f"stalled {format_duration(idle)}")
+        return " · ".join(parts)
+    if transfer["avg_speed"]:
+        parts.append(f"{format_size(transfer['avg_speed'])}/s")
+    if transfer["eta"] is not None:
+        eta = format_duration(transfer["eta"])
+        parts.append(eta if short else f"{eta} left")
+    return " · ".join(parts)
+
+
+class TransferProgress:
+    # Follows one response body as StreamWriter writes it and hands snapshot
+    # dicts to `report`: bytes received and expected (None when the server
+    # sends no length), the speed over the last measuring window, a smoothed
+    # speed and the ETA derived from it. Called on the download's own thread.
+    def __init__(self, report, received=0, total=None):
+        self.report = report
+        self.total = total or None
+        self.received = received
+        self.speed = None
+        self.avg_speed = None
+        self._step = (
+            max(1, int(self.total * TRANSFER_REPORT_FRACTION)) if self.total else 0
+        )
+        self._reported = received
+        self._window_start = time.monotonic()
+        self._window_bytes = received
+        self._publish(self._window_start)
+
+    def update(self, received):
+        self.received = received
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= TRANSFER_REPORT_SECONDS:
+            # Speeds are only measured over whole windows; chunks that arrive
+            # back to back would otherwise read as bursts of huge speed
+            self._measure(now, elapsed)
+        elif not (self._step and received - self._reported >= self._step):
+            return
+        self._reported = received
+        self._publish(now)
+
+    def finish(self, received):
+        # The last chunk rarely lands on a report, so the total is sent once
+        self.received = received
+        if received != self._reported:
+            self._reported = received
+            self._publish(time.monotonic())
+
+    def _measure(self, now, elapsed):
+        self.speed = (self.received - self._window_bytes) / elapsed
+        if self.avg_speed is None:
+            self.avg_speed = self.speed
+        else:
+            # Exponential moving average weighted by the time each window
+            # covers, so uneven windows do not skew the smoothing
+            weight = 1 - math.exp(-elapsed / SPEED_SMOOTHING_SECONDS)
+            self.avg_speed += weight * (self.speed - self.avg_speed)
+        self._window_start, self._window_bytes = now, self.received
+
+    def _publish(self, now):
+        eta = None
+        if self.total and self.avg_speed:
+            eta = max(0, self.total - self.received) / self.avg_speed
+        self.report(
+            {
+                "received": self.received,
+                "total": self.total,
+                "speed": self.speed,
+                "avg_speed": self.avg_speed,
+                "eta": eta,
+                "at": now,
+            }
+        )
+
+
+class ProgressAggregator:
+    # Workers report here from their own threads (or the asyncio loop thread)
+    # instead of emitting a queued signal per report. Only the latest status
+    # message and byte count per job are kept, and the GUI thread drains them
+    # once per frame, so a burst of reports costs one dict write each rather
+    # than one event.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}
+
+    def report(self, job_id, message):
+        self._update(job_id, "message", message)
+
+    def report_transfer(self, job_id, transfer):
+        self._update(job_id, "transfer", transfer)
+
+    def _update(self, job_id, field, value):
+        with self._lock:
+            # Re-inserted so that drain() lists jobs by their last report
+            fields = self._latest.pop(job_id, None) or {}
+            fields[field] = value
+            self._latest[job_id] = fields
+
+    def reporter(self, job_id):
+        return lambda message: self.report(job_id, message)
+
+    def transfer_reporter(self, job_id):
+        return lambda transfer: self.report_transfer(job_id, transfer)
+
+    def discard(self, job_id):
+        with self._lock:
+            self._latest.pop(job_id, None)
+
+    def drain(self):
+        # {job_id: {"message": ..., "transfer": ...}}, either key optional
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        return latest
@@ -0,0 +1,188 @@
+import time
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from downloader.errors import DownloadCancelled
+
+DEFAULT_HOST_CONCURRENCY = 6
+MAX_HOST_CONCURRENCY = 64
+# Requests started per second per host; 0 turns the token bucket off
+DEFAULT_HOST_RPS = 10.0
+# Used for a 429/503 that does not say how long to wait
+DEFAULT_BACKOFF = 5.0
+MAX_BACKOFF = 300.0
+# How often a blocked thread wakes up to check for cancellation
+CANCEL_POLL_INTERVAL = 0.25
+
+
+def host_key(url):
+    return (urlparse(url).hostname or "").lower()
+
+
+def parse_retry_after(value):
+    # Either delay-seconds or an HTTP-date (RFC 9110 section 10.2.3)
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class _HostState:
+    def __init__(self, capacity):
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.active = 0
+        self.blocked_until = 0.0
+        self.async_waiters = []
+
+
+class HostRateLimiter:
+    # Token bucket plus a concurrency cap per hostname. Every request takes a
+    # slot for as long as its response is being read; hosts are independent,
+    # so one slow or throttling host does not hold back the others.
+    def __init__(
+        self,
+        max_per_host=DEFAULT_HOST_CONCURRENCY,
+        requests_per_second=DEFAULT_HOST_RPS,
+    ):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._hosts = {}
+        self.configure(max_per_host, requests_per_second)
+
+    def configure(self, max_per_host=None, requests_per_second=None):
+        with self._lock:
+            if max_per_host is not None:
+                self.max_per_host = max(1, min(int(max_per_host), MAX_HOST_CONCURRENCY))
+            if requests_per_second is not None:
+                self.requests_per_second = max(0.0, float(requests_per_second))
+            # A burst of up to one second's worth of requests is allowed
+            self.capacity = max(1.0, self.requests_per_second)
+            self._wake_all()
+
+    def backoff(self, host, seconds=None):
+        delay = min(DEFAULT_BACKOFF if seconds is None else seconds, MAX_BACKOFF)
+        with self._lock:
+            state = self._state(host)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+        return delay
+
+    def paused_for(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return 0.0
+            return max(0.0, state.blocked_until - time.monotonic())
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.capacity)
+        return state
+
+    def _try_acquire(self, host):
+        # Returns 0 once a slot is taken, otherwise how long to wait before
+        # trying again (None: until another request on the host finishes)
+        state = self._state(host)
+        now = time.monotonic()
+        if state.blocked_until > now:
+            return state.blocked_until - now
+        if state.active >= self.max_per_host:
+            return None
+        if self.requests_per_second:
+            self._refill(state, now)
+            if state.tokens < 1:
+                return (1 - state.tokens) / self.requests_per_second
+            state.tokens -= 1
+        state.active += 1
+        return 0
+
+    def _refill(self, state, now):
+        elapsed = now - state.updated
+        state.tokens = min(
+            self.capacity, state.tokens + elapsed * self.requests_per_second
+        )
+        state.updated = now
+
+    def _release(self, host):
+        with self._lock:
+            state = self._hosts[host]
+            state.active -= 1
+            self._wake(state)
+            if not state.active and not state.async_waiters:
+                # Keep the table small on runs touching thousands of hosts,
+                # but remember hosts that are still paused or rate limited
+                now = time.monotonic()
+                self._refill(state, now)
+                if state.blocked_until <= now and state.tokens >= self.capacity:
+                    del self._hosts[host]
+
+    def _wake(self, state):
+        self._changed.notify_all()
+        waiters, state.async_waiters = state.async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def _wake_all(self):
+        for state in self._hosts.values():
+            self._wake(state)
+
+    @contextmanager
+    def slot(self, host, should_cancel=None):
+        with self._lock:
+            while (delay := self._try_acquire(host)) != 0:
+                if should_cancel and should_cancel():
+                    raise DownloadCancelled()
+                poll = CANCEL_POLL_INTERVAL
+                self._changed.wait(poll if delay is None else min(delay, poll))
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    @asynccontextmanager
+    async def slot_async(self, host):
+        # Only reached on the asyncio engine, which has imported asyncio
+        # already; the threaded path and the GUI never load it
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                delay = self._try_acquire(host)
+                if delay == 0:
+                    break
+                future = loop.create_future()
+                self._state(host).async_waiters.append((loop, future))
+            try:
+                await asyncio.wait_for(future, delay)
+            except asyncio.TimeoutError:
+                pass
+        try:
+            yield
+        finally:
+            self._release(host)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+_limiter = HostRateLimiter()
+
+
+def configure_rate_limits(
+    max_per_host=DEFAULT_HOST_CONCURRENCY, requests_per_second=DEFAULT_HOST_RPS
+):
+    _limiter.configure(max_per_host, requests_per_second)
+
+
+def get_rate_limiter():
+    return _limiter
@@ -0,0 +1,121 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from downloader.streaming import discard_temp_file
+
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-\d+/(\d+|\*)")
+
+_lock = threading.Lock()
+_active_paths = set()
+
+
+class PartialDownload:
+    # A ".part" file named after the URL plus a JSON sidecar holding the
+    # validators and byte offset, so an interrupted download can continue
+    # with a Range request instead of starting over
+    def __init__(self, folder_path, url):
+        self.url = url
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(folder_path, f".pixora-{digest}.part")
+        with _lock:
+            self.resumable = path not in _active_paths
+            if self.resumable:
+                _active_paths.add(path)
+        if not self.resumable:
+            # The same URL is already downloading into this folder
+            fd, path = tempfile.mkstemp(
+                prefix=".pixora-", suffix=".part", dir=folder_path
+            )
+            os.close(fd)
+        self.path = path
+        self.meta_path = f"{path}.json"
+        self.offset = 0
+        self.etag = None
+        self.last_modified = None
+        if self.resumable:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            size = os.path.getsize(self.path)
+        except (OSError, ValueError):
+            return
+        if meta.get("url") != self.url:
+            return
+        self.etag = meta.get("etag")
+        self.last_modified = meta.get("last_modified")
+        self.offset = min(int(meta.get("offset", 0)), size)
+
+    def validator(self):
+        # Weak ETags are not allowed in If-Range
+        if self.etag and not self.etag.startswith("W/"):
+            return self.etag
+        return self.last_modified
+
+    def resume_headers(self):
+        validator = self.validator()
+        if self.offset <= 0 or not validator:
+            return {}
+        # If-Range makes the server send the whole image when it has changed
+        return {"Range": f"bytes={self.offset}-", "If-Range": validator}
+
+    def accepts(self, status_code, headers):
+        if status_code == 206:
+            match = CONTENT_RANGE_RE.match(headers.get("Content-Range", ""))
+            return bool(match) and int(match.group(1)) == self.offset
+        if status_code == 416:
+            return False
+        # Server ignored the range (or the image changed): start from zero
+        self.reset()
+        return True
+
+    def reset(self):
+        self.offset = 0
+        self.etag = None
+        self.last_modified = None
+
+    def begin(self, headers):
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.checkpoint(self.offset)
+
+    def checkpoint(self, offset):
+        self.offset = offset
+        if not self.resumable or not self.validator():
+            return
+        meta = {
+            "url": self.url,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "offset": offset,
+        }
+        temp_meta_path = f"{self.meta_path}.tmp"
+        try:
+            with open(temp_meta_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(temp_meta_path, self.meta_path)
+        except OSError:
+            pass
+
+    def release(self):
+        # Keeps the bytes on disk for a later resume when that is possible
+        if not (self.resumable and self.validator()):
+            self.discard()
+            return
+        with _lock:
+            _active_paths.discard(self.path)
+
+    def discard(self):
+        discard_temp_file(self.path)
+        self.finish()
+
+    def finish(self):
+        discard_temp_file(self.meta_path)
+        if self.resumable:
+            with _lock:
+                _active_paths.discard(self.path)
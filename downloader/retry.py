@@ -0,0 +1,106 @@
+import sys
+import random
+import threading
+
+DEFAULT_MAX_RETRIES = 3
+MAX_RETRIES_LIMIT = 10
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+# Statuses a later attempt can reasonably expect to succeed on
+TRANSIENT_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+_lock = threading.Lock()
+
+
+def transient_errors():
+    # Built on use instead of at import, so configuring retries at startup
+    # loads neither requests nor aiohttp. An aiohttp error can only exist
+    # once the asyncio engine has imported aiohttp.
+    import requests
+
+    errors = (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+        ConnectionError,
+        TimeoutError,
+    )
+    if (aiohttp := sys.modules.get("aiohttp")) is not None:
+        errors += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+    return errors
+
+
+def permanent_errors():
+    # Retrying these cannot help: the URL itself is unusable
+    import requests
+
+    return (
+        requests.exceptions.InvalidURL,
+        requests.exceptions.MissingSchema,
+        requests.exceptions.InvalidSchema,
+        requests.exceptions.SSLError,
+    )
+
+
+class HTTPStatusError(ValueError):
+    def __init__(self, status_code, message=None, retry_after=None):
+        super().__init__(message or f"HTTP {status_code}: Unable to access the URL")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    # Capped exponential backoff with full jitter: attempt n waits a random
+    # time in [0, min(max_delay, base_delay * 2**(n-1))], so clients that
+    # failed together do not come back together
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=DEFAULT_BASE_DELAY,
+        max_delay=DEFAULT_MAX_DELAY,
+    ):
+        self.max_retries = max(0, min(int(max_retries), MAX_RETRIES_LIMIT))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @property
+    def max_attempts(self):
+        return self.max_retries + 1
+
+    def is_transient(self, error):
+        if isinstance(error, HTTPStatusError):
+            return error.status_code in TRANSIENT_STATUSES
+        if isinstance(error, permanent_errors()):
+            return False
+        return isinstance(error, transient_errors())
+
+    def next_delay(self, attempt, error):
+        # None means give up: the error is permanent or attempts ran out
+        if attempt >= self.max_attempts or not self.is_transient(error):
+            return None
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling)
+        # A server-provided Retry-After wins over a shorter random delay
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+_policy = RetryPolicy()
+
+
+def configure_retries(
+    max_retries=DEFAULT_MAX_RETRIES,
+    base_delay=DEFAULT_BASE_DELAY,
+    max_delay=DEFAULT_MAX_DELAY,
+):
+    global _policy
+    with _lock:
+        _policy = RetryPolicy(max_retries, base_delay, max_delay)
+
+
+def get_retry_policy():
+    with _lock:
+        return _policy
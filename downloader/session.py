@@ -0,0 +1,57 @@
+import threading
+
+DEFAULT_POOL_SIZE = 10
+# Number of per-host connection pools kept alive at once
+DEFAULT_HOST_POOLS = 32
+
+_lock = threading.Lock()
+_local = threading.local()
+_adapter = None
+_generation = 0
+_pool_size = DEFAULT_POOL_SIZE
+_host_pools = DEFAULT_HOST_POOLS
+
+
+def configure_pool(pool_size=DEFAULT_POOL_SIZE, host_pools=DEFAULT_HOST_POOLS):
+    global _adapter, _generation, _pool_size, _host_pools
+    pool_size = max(1, int(pool_size))
+    host_pools = max(1, int(host_pools))
+    with _lock:
+        if (pool_size, host_pools) == (_pool_size, _host_pools):
+            return
+        _pool_size, _host_pools = pool_size, host_pools
+        # Sessions still using the old adapter keep it until they are
+        # rebuilt on their next get_session() call
+        _adapter = None
+        _generation += 1
+
+
+def _shared_adapter():
+    global _adapter
+    # requests is imported with the first session, so configure_pool() at
+    # startup does not pay for it
+    from requests.adapters import HTTPAdapter
+
+    with _lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(
+                pool_connections=_host_pools, pool_maxsize=_pool_size
+            )
+        return _adapter, _generation
+
+
+def get_session():
+    # requests.Session is not guaranteed thread-safe, so each thread gets its
+    # own Session, but all of them mount the same adapter and therefore share
+    # the per-host keep-alive connection pools
+    adapter, generation = _shared_adapter()
+    session = getattr(_local, "session", None)
+    if session is None or _local.generation != generation:
+        from requests import Session
+
+        session = Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+        _local.generation = generation
+    return session
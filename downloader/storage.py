@@ -0,0 +1,18 @@
+import sqlite3
+from pathlib import Path
+
+DATA_DIR = Path.home() / ".pixora"
+
+
+def data_path(name):
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return DATA_DIR / name
+
+
+def open_database(path):
+    # One connection shared between worker threads; callers serialize access
+    # with their own lock
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
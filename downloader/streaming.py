@@ -0,0 +1,180 @@
+import os
+import time
+from io import BytesIO
+from downloader.errors import DownloadCancelled
+
+CHUNK_SIZE = 64 * 1024
+# Headers of most formats fit in the first few KB; formats with large
+# metadata blocks (EXIF thumbnails, ICC profiles) get retried with more data.
+SNIFF_SIZE = 16 * 1024
+MAX_SNIFF_SIZE = 1024 * 1024
+# How often a running download reports how far it got, for resuming later
+CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+
+class NotAnImageError(ValueError):
+    def __init__(self, message="This URL does not point to a valid image"):
+        super().__init__(message)
+
+
+def format_size(num_bytes):
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):.1f} MB"
+    return f"{num_bytes / 1024:.0f} KB"
+
+
+class ImageTooLargeError(ValueError):
+    def __init__(self, size, max_bytes):
+        super().__init__(
+            f"Image is larger than the {format_size(max_bytes)} limit"
+            + (f" ({format_size(size)})" if size else "")
+        )
+        self.size = size
+        self.max_bytes = max_bytes
+
+
+def sniff_image_format(head):
+    # PIL is imported on first use; a cold start does not need it
+    from PIL import Image
+
+    try:
+        with Image.open(BytesIO(bytes(head))) as image:
+            return image.format.lower() if image.format else None
+    except Exception:
+        return None
+
+
+def read_head(file_path, length):
+    with open(file_path, "rb") as f:
+        return bytearray(f.read(min(length, MAX_SNIFF_SIZE)))
+
+
+def hash_existing(file_path, length, hasher, chunk_size=CHUNK_SIZE):
+    with open(file_path, "rb") as f:
+        while length > 0 and (chunk := f.read(min(chunk_size, length))):
+            hasher.update(chunk)
+            length -= len(chunk)
+
+
+class StreamWriter:
+    # Writes response chunks to disk while sniffing the image type, hashing
+    # and checkpointing. Used by the blocking requests loop below and by the
+    # asyncio engine, which feeds it chunks from the event loop.
+    def __init__(
+        self,
+        file_path,
+        resume_from=0,
+        checkpoint=None,
+        hasher=None,
+        max_bytes=0,
+        timings=None,
+        progress=None,
+    ):
+        self.file_path = file_path
+        # Optional SpanRecorder for disk write and format sniffing times
+        self.timings = timings
+        # Optional TransferProgress told about every chunk written
+        self.progress = progress
+        self.checkpoint = checkpoint
+        self.hasher = hasher
+        self.max_bytes = max_bytes
+        # A resumed download already has its first bytes on disk, so those
+        # seed the sniff buffer instead of the response body
+        self.head = read_head(file_path, resume_from) if resume_from else bytearray()
+        if hasher and resume_from:
+            hash_existing(file_path, resume_from, hasher)
+        self.image_format = None
+        self.next_sniff = max(SNIFF_SIZE, len(self.head))
+        self.written = resume_from
+        self.next_checkpoint = resume_from + CHECKPOINT_BYTES
+        self.file = open(file_path, "r+b" if resume_from else "wb")
+        if resume_from:
+            self.file.truncate(resume_from)
+            self.file.seek(resume_from)
+
+    def write(self, chunk):
+        # Servers that send no Content-Length are only caught here
+        if self.max_bytes and self.written + len(chunk) > self.max_bytes:
+            raise ImageTooLargeError(None, self.max_bytes)
+        if self.image_format is None:
+            self.head += chunk[: MAX_SNIFF_SIZE - len(self.head)]
+            if len(self.head) >= self.next_sniff:
+                self.image_format = self.sniff()
+                if self.image_format is None and len(self.head) >= MAX_SNIFF_SIZE:
+                    raise NotAnImageError()
+                self.next_sniff = min(len(self.head) * 2, MAX_SNIFF_SIZE)
+        if self.timings is None:
+            self.file.write(chunk)
+        else:
+            started = time.perf_counter()
+            self.file.write(chunk)
+            self.timings.add("write", time.perf_counter() - started)
+            self.timings.count_bytes(len(chunk))
+        if self.hasher:
+            self.hasher.update(chunk)
+        self.written += len(chunk)
+        if self.checkpoint and self.written >= self.next_checkpoint:
+            self.file.flush()
+            self.checkpoint(self.written)
+            self.next_checkpoint = self.written + CHECKPOINT_BYTES
+        if self.progress:
+            self.progress.update(self.written)
+
+    def close(self):
+        self.file.close()
+        if self.checkpoint:
+            self.checkpoint(self.written)
+
+    def finish(self):
+        self.close()
+        if self.progress:
+            self.progress.finish(self.written)
+        if self.image_format is None:
+            self.image_format = self.sniff()
+        if self.image_format is None:
+            raise NotAnImageError()
+        return self.image_format
+
+    def sniff(self):
+        if self.timings is None:
+            return sniff_image_format(self.head)
+        with self.timings.span("decode"):
+            return sniff_image_format(self.head)
+
+
+def stream_to_file(
+    response,
+    file_path,
+    resume_from=0,
+    chunk_size=CHUNK_SIZE,
+    should_cancel=None,
+    checkpoint=None,
+    hasher=None,
+    max_bytes=0,
+    timings=None,
+    progress=None,
+):
+    writer = StreamWriter(
+        file_path, resume_from, checkpoint, hasher, max_bytes, timings, progress
+    )
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if should_cancel and should_cancel():
+                raise DownloadCancelled()
+            if chunk:
+                writer.write(chunk)
+    except BaseException:
+        writer.close()
+        raise
+    return writer.finish()
+
+
+def commit_temp_file(temp_path, save_path):
+    os.replace(temp_path, save_path)
+
+
+def discard_temp_file(temp_path):
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
@@ -0,0 +1,145 @@
+import os
+import threading
+from downloader.storage import data_path
+
+THUMBNAIL_SIZE = 128
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# Decoding is CPU-bound, but a couple of processes keep up with any
+# download rate without competing with the GUI for every core
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_thumbnailer = None
+_thumbnailer_lock = threading.Lock()
+
+
+def render_thumbnail(source_path, target_path, size=THUMBNAIL_SIZE):
+    # Runs in a worker process. draft() lets JPEG decode at 1/2..1/8 scale,
+    # so a 24 MP photo never gets fully decoded just to be shrunk to 128 px.
+    from PIL import Image
+
+    with Image.open(source_path) as image:
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        temp_path = f"{target_path}.part"
+        image.save(temp_path, "PNG")
+    os.replace(temp_path, target_path)
+    return os.path.getsize(target_path)
+
+
+class ThumbnailCache:
+    # <content hash>.png files, evicted least recently used first (by mtime,
+    # which lookup() refreshes) once the folder grows past max_bytes
+    def __init__(self, folder=None, max_bytes=DEFAULT_CACHE_BYTES):
+        self.folder = folder or data_path("thumbnails")
+        self.max_bytes = max_bytes
+        os.makedirs(self.folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = sum(size for _, _, size in self._entries())
+
+    def path_for(self, key):
+        return os.path.join(self.folder, f"{key}.png")
+
+    def lookup(self, key):
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def added(self, size):
+        with self._lock:
+            self._total += size
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            # Down to 90% so a full cache does not evict on every new entry
+            for _, path, size in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total = total
+
+    def _entries(self):
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.name.endswith(".png"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, entry.path, stat.st_size
+
+
+class Thumbnailer:
+    # Hands thumbnail work to a process pool so decoding never runs on the
+    # GUI thread; a key already being rendered shares the pending future
+    def __init__(self, cache=None, max_workers=MAX_WORKERS):
+        self.cache = cache or ThumbnailCache()
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = {}
+
+    def request(self, key, source_path):
+        # A cached path right away, or a Future that resolves to one
+        if path := self.cache.lookup(key):
+            return path
+        with self._lock:
+            if future := self._pending.get(key):
+                return future
+            if self._pool is None:
+                # Loaded with the first thumbnail, not at startup
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # spawn: forking a process that runs Qt and network threads
+                # can deadlock the child on a lock held at fork time
+                self._pool = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            target_path = self.cache.path_for(key)
+            future = self._pool.submit(render_thumbnail, source_path, target_path)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.added(future.result())
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._pending.clear()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_thumbnailer():
+    global _thumbnailer
+    with _thumbnailer_lock:
+        if _thumbnailer is None:
+            _thumbnailer = Thumbnailer()
+        return _thumbnailer
+
+
+def shutdown_thumbnailer():
+    global _thumbnailer
+    with _thumbnailer_lock:
+        thumbnailer, _thumbnailer = _thumbnailer, None
+    if thumbnailer is not None:
+        thumbnailer.shutdown()
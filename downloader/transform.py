@@ -0,0 +1,139 @@
+import os
+import math
+import tempfile
+import threading
+from downloader.conversion import OUTPUT_FORMATS, RGB_ONLY_FORMATS, needs_conversion
+from downloader.errors import DownloadCancelled
+from downloader.rate_limiter import CANCEL_POLL_INTERVAL
+
+MAX_DIMENSION_LIMIT = 16384
+# Encoder quality when a lossy format is written and none was asked for;
+# Pillow's own defaults (75 for JPEG, 80 for WebP) visibly soften photos
+DEFAULT_QUALITY = 85
+# Formats with a lossy quality setting
+QUALITY_FORMATS = ("jpeg", "webp")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def needs_transform(ext, output_format, max_dimension, strip_metadata, quality):
+    return bool(
+        needs_conversion(ext, output_format)
+        or max_dimension
+        or strip_metadata
+        or quality is not None
+    )
+
+
+def transform_image_file(
+    source_path,
+    folder_path,
+    output_format=None,
+    max_dimension=0,
+    strip_metadata=False,
+    quality=None,
+):
+    # Runs in a worker process. Returns (temp path, ext), or None when the
+    # source already fits and nothing asks for re-encoding.
+    from PIL import Image, ImageOps
+
+    if output_format and output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    with Image.open(source_path) as image:
+        ext = output_format or image.format.lower()
+        too_large = max_dimension and max(image.size) > max_dimension
+        if not (
+            too_large
+            or strip_metadata
+            or quality is not None
+            or needs_conversion(image.format.lower(), output_format)
+        ):
+            return None
+        save_format = OUTPUT_FORMATS.get(ext, image.format)
+        # Metadata of the original, unless it is being stripped
+        extra = {}
+        if not strip_metadata:
+            for key in ("exif", "icc_profile"):
+                if image.info.get(key):
+                    extra[key] = image.info[key]
+        if ext in QUALITY_FORMATS:
+            extra["quality"] = DEFAULT_QUALITY if quality is None else quality
+        if too_large:
+            # JPEG decodes straight at 1/2, 1/4 or 1/8 scale when that still
+            # covers the target size, which is most of the cost saved
+            scale = max_dimension / max(image.size)
+            image.draft(
+                image.mode,
+                (math.ceil(image.width * scale), math.ceil(image.height * scale)),
+            )
+        if strip_metadata or too_large:
+            # Bake the EXIF orientation into the pixels; it would be lost or
+            # wrong for the new image otherwise
+            image = ImageOps.exif_transpose(image)
+            if "exif" in extra:
+                extra["exif"] = image.getexif().tobytes()
+        if too_large:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        if ext in RGB_ONLY_FORMATS and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        fd, temp_path = tempfile.mkstemp(
+            prefix=".pixora-", suffix=".part", dir=folder_path
+        )
+        try:
+            # mkstemp files are private; the saved image gets the mode any
+            # other new file in the folder would
+            with os.fdopen(fd, "wb") as f:
+                os.chmod(temp_path, new_file_mode())
+                image.save(f, save_format, **extra)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return temp_path, ext
+
+
+def new_file_mode():
+    # Reading the umask means setting it; this runs in a pool process
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def get_transform_pool():
+    # Sized to the CPU count: transforms are CPU-bound and run in separate
+    # processes, so they neither hold the GIL nor occupy download threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            _pool = ProcessPoolExecutor(
+                os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def submit_transform(source_path, folder_path, **transform):
+    return get_transform_pool().submit(
+        transform_image_file, source_path, folder_path, **transform
+    )
+
+
+def wait_for(future, should_cancel=None):
+    while True:
+        if should_cancel and should_cancel():
+            future.cancel()
+            raise DownloadCancelled()
+        try:
+            return future.result(timeout=CANCEL_POLL_INTERVAL)
+        except TimeoutError:
+            continue
+
+
+def shutdown_transform_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
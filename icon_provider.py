@@ -21,6 +21,9 @@ class IconProvider:
         "history": "🕒",
         "auto": "🔄",
         "filename": "📝",
+        "queue": "📥",
+        "queued": "⏳",
+        "cancel": "⛔",
     }
     ICON_DIR = os.path.join(os.path.dirname(__file__), "icons")
 
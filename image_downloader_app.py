@@ -11,14 +11,43 @@ from PySide6.QtWidgets import (
     QMenu,
     QApplication,
 )
-from PySide6.QtGui import QIcon, QTextCursor
-from PySide6.QtCore import Qt, QTimer, QPropertyAnimation, QThread
+from PySide6.QtCore import Qt, QPropertyAnimation, QTimer
 from icon_provider import IconProvider
 from settings_panel import SettingsPanel
-from download_worker import DownloadWorker
+from download_queue import DownloadQueue, DEFAULT_MAX_CONCURRENT
+from widgets.queue_model import QueueModel
+from widgets.history_model import HistoryModel, history_message
+from widgets.gallery_model import GalleryModel
+from downloader.session import configure_pool, DEFAULT_POOL_SIZE
+from downloader.batch import load_urls, load_url_file, normalize_url
+from downloader.dedup_store import DEDUP_HARDLINK
+from downloader.http_cache import configure_http_cache, DEFAULT_MAX_ENTRIES
+from downloader.history_store import get_history_store
+from downloader.thumbnails import shutdown_thumbnailer
+from downloader.transform import shutdown_transform_pool
+from downloader.metrics import get_metrics
+from downloader.engines import ENGINE_THREADED, DEFAULT_MAX_IN_FLIGHT
+from downloader.preload import preload_in_background
+from downloader.progress import describe_transfer
+from downloader.retry import configure_retries, DEFAULT_MAX_RETRIES
+from downloader.preflight import DEFAULT_MAX_IMAGE_BYTES
+from downloader.rate_limiter import (
+    configure_rate_limits,
+    DEFAULT_HOST_CONCURRENCY,
+    DEFAULT_HOST_RPS,
+)
+from widgets.batch_dialog import BatchImportDialog
 from widgets.overlay_widget import OverlayWidget
 from widgets.panels import create_left_panel, create_right_panel
-from settings.settings_manager import load_settings, save_settings
+from settings.settings_manager import load_settings, SettingsWriter
+from utils.debounce import Debouncer
+from utils.theme import set_style_state, STATUS_COLORS
+
+
+AUTO_DOWNLOAD_DELAY_MS = 1000
+# The download pipeline loads in the background once startup has settled
+PRELOAD_DELAY_MS = 1000
+METRICS_INTERVAL_MS = 1000
 
 
 class ImageDownloaderApp(QMainWindow):
@@ -29,15 +58,57 @@ class ImageDownloaderApp(QMainWindow):
 
         self.folder_path = ""
         self.downloaded_file_path = ""
-        self.download_thread = None
-        self.worker = None
         self.auto_download = False
         self.settings_panel = None
         self.overlay = None
         self.custom_filename = ""
+        self.output_format = ""
+        self.max_concurrent_downloads = DEFAULT_MAX_CONCURRENT
+        self.connection_pool_size = DEFAULT_POOL_SIZE
+        self.dedup_mode = DEDUP_HARDLINK
+        self.skip_known_urls = False
+        self.use_http_cache = True
+        self.http_cache_max_entries = DEFAULT_MAX_ENTRIES
+        self.download_engine = ENGINE_THREADED
+        self.async_max_in_flight = DEFAULT_MAX_IN_FLIGHT
+        self.host_max_concurrent = DEFAULT_HOST_CONCURRENCY
+        self.host_requests_per_second = DEFAULT_HOST_RPS
+        self.max_retries = DEFAULT_MAX_RETRIES
+        self.use_preflight = True
+        self.max_image_mb = DEFAULT_MAX_IMAGE_BYTES // (1024 * 1024)
+        # What the batch dialog offers next time; 0 means off / the encoder's
+        # default. Never applied to downloads outside that batch.
+        self.batch_max_dimension = 0
+        self.batch_strip_metadata = False
+        self.batch_quality = 0
+
+        self.download_queue = DownloadQueue(self, self.max_concurrent_downloads)
+        self.download_queue.jobs_progressed.connect(self.update_download_progress)
+        self.download_queue.job_finished.connect(self.download_finished)
+        self.download_queue.queue_changed.connect(self.update_queue_state)
+        self.queue_model = QueueModel(self.download_queue, self)
+        self.history_model = HistoryModel(self, get_history_store())
+        self.gallery_model = GalleryModel(self, get_history_store())
+
+        self.settings_writer = SettingsWriter(self)
+        QApplication.instance().aboutToQuit.connect(self.settings_writer.flush)
+        # Restarted on every keystroke, so typing or editing a URL with
+        # auto-download on queues it once, after the typing stops
+        self.auto_download_timer = Debouncer(
+            AUTO_DOWNLOAD_DELAY_MS, self.auto_download_url, self
+        )
+        self._last_auto_url = None
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(METRICS_INTERVAL_MS)
+        self.metrics_timer.timeout.connect(self.update_metrics)
+        # Created by init_effects() once the window has been shown
+        self.status_anim = None
+        self.download_anim = None
 
         self.init_ui()
         load_settings(self)
+        self.apply_concurrency_settings()
+        configure_http_cache(max_entries=self.http_cache_max_entries)
 
     def init_ui(self):
         # Main widget with clean background
@@ -74,7 +145,15 @@ class ImageDownloaderApp(QMainWindow):
 
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
+        # Shadows and fades are not needed to show the window, so they are
+        # set up on the first event loop pass; the settings panel is built
+        # when first opened
+        QTimer.singleShot(0, self.init_effects)
+        QTimer.singleShot(
+            PRELOAD_DELAY_MS, lambda: preload_in_background(self.download_engine)
+        )
 
+    def init_effects(self):
         # --- Add Drop Shadow to Settings Button ---
         shadow = QGraphicsDropShadowEffect()
         shadow.setBlurRadius(8)
@@ -101,9 +180,20 @@ class ImageDownloaderApp(QMainWindow):
         self.download_anim = QPropertyAnimation(self.download_opacity, b"opacity")
         self.download_anim.setDuration(350)
 
+    def ensure_settings_panel(self):
+        if self.settings_panel is not None:
+            return
         self.settings_panel = SettingsPanel(
             self,
             auto_download=self.auto_download,
+            output_format=self.output_format,
+            max_concurrent=self.max_concurrent_downloads,
+            dedup_mode=self.dedup_mode,
+            download_engine=self.download_engine,
+            host_max_concurrent=self.host_max_concurrent,
+            host_requests_per_second=self.host_requests_per_second,
+            max_retries=self.max_retries,
+            max_image_mb=self.max_image_mb,
             on_save=self.handle_settings_save,
             on_close=self.close_settings_panel,
         )
@@ -115,7 +205,7 @@ class ImageDownloaderApp(QMainWindow):
         if folder := QFileDialog.getExistingDirectory(self, "Select Download Folder"):
             self.folder_path = folder
             self.update_folder_label()
-            save_settings(self)
+            self.settings_writer.schedule()
 
     def update_folder_label(self):
         if self.folder_path:
@@ -124,48 +214,23 @@ class ImageDownloaderApp(QMainWindow):
                 f"{IconProvider.get('folder')} {self.folder_path}"
             )
             self.folder_label.setToolTip(self.folder_path)
-            self.set_folder_label_style_and_buttons(
-                """
-                QLabel {
-                    color: #27AE60;
-                    font-size: 13px;
-                    font-weight: 600;
-                    background: #D5F4E6;
-                    padding: 10px;
-                    border-radius: 6px;
-                    border: 1px solid #27AE60;
-                }
-            """,
-                True,
-                " Change Folder",
-            )
+            self.set_folder_state(True, " Change Folder")
         else:
             self.folder_label.setText("No folder selected")
-            self.set_folder_label_style_and_buttons(
-                """
-                QLabel {
-                    color: #7F8C8D;
-                    font-size: 13px;
-                    background: #ECF0F1;
-                    padding: 10px;
-                    border-radius: 6px;
-                    border: 1px solid #BDC3C7;
-                }
-            """,
-                False,
-                " Choose Folder",
-            )
+            self.set_folder_state(False, " Choose Folder")
 
-    def set_folder_label_style_and_buttons(
-        self, label_style, enable_open_btn, folder_btn_text
-    ):
-        self.folder_label.setStyleSheet(label_style)
-        self.open_btn.setEnabled(enable_open_btn)
+    def set_folder_state(self, selected, folder_btn_text):
+        set_style_state(self.folder_label, "selected", selected)
+        self.open_btn.setEnabled(selected)
         self.folder_btn.setText(f"{IconProvider.get('folder_open')}{folder_btn_text}")
 
     def paste_clipboard(self):
         clipboard = QApplication.clipboard()
         if text := clipboard.text():
+            # A clipboard holding several URLs is treated as a batch
+            if len(urls := load_urls(text)) > 1:
+                self.enqueue_urls(urls)
+                return
             self.url_input.setText(text)
             self.show_status(
                 f"{IconProvider.get('paste')} URL pasted from clipboard", "info"
@@ -187,21 +252,40 @@ class ImageDownloaderApp(QMainWindow):
         self.filename_input.clear()
         self.show_status(f"{IconProvider.get('clear')} Filename cleared", "info")
         # Remove from config
-        save_settings(self)
+        self.settings_writer.schedule()
 
     def clear_history(self):
-        self.history_text.setPlainText("No downloads yet...")
+        self.history_model.clear()
 
     def on_url_change(self):
         if self.url_input.text().strip():
             self.show_status(f"{IconProvider.get('link')} URL entered", "info")
             if self.auto_download:
-                QTimer.singleShot(1000, self.download_image)
+                self.auto_download_timer.trigger()
         else:
+            self.auto_download_timer.cancel()
+            self._last_auto_url = None
             self.show_status("Ready to download images", "info")
 
+    def auto_download_url(self):
+        if not (url := normalize_url(self.url_input.text())):
+            self.show_status(
+                f"{IconProvider.get('warning')} Not a valid image URL yet", "warning"
+            )
+            return
+        # Edits that end on the URL already queued do not queue it again
+        if url == self._last_auto_url:
+            return
+        self._last_auto_url = url
+        self.queue_download(url)
+
     def download_image(self):
-        url = self.url_input.text().strip()
+        text = self.url_input.text().strip()
+        # Queued in the same normalized form auto-download checks; anything
+        # that does not normalize goes through as typed and fails with a reason
+        self.queue_download(normalize_url(text) or text)
+
+    def queue_download(self, url):
         if not url:
             self.show_status(
                 f"{IconProvider.get('warning')} Please enter an image URL", "error"
@@ -214,101 +298,218 @@ class ImageDownloaderApp(QMainWindow):
             )
             return
 
-        # --- Animate download button fade out ---
-        self.download_anim.stop()
-        self.download_anim.setStartValue(1.0)
-        self.download_anim.setEndValue(0.5)
-        self.download_anim.start()
-        self.download_btn.setEnabled(False)
-        self.download_btn.setIcon(QIcon("icons/spinner.svg"))  # Use a spinner SVG/GIF
-        self.download_btn.setText(" Downloading...")
-        self.paste_btn.setEnabled(False)
-
-        # Get custom filename if provided
-        custom_filename = self.filename_input.text().strip() or None
-
-        # Create worker thread
-        self.download_thread = QThread()
-        self.worker = DownloadWorker(url, self.folder_path, custom_filename)
-        self.worker.moveToThread(self.download_thread)
-
-        # Connect signals
-        self.download_thread.started.connect(self.worker.download)
-        self.worker.progress.connect(self.update_download_progress)
-        self.worker.finished.connect(self.download_finished)
-        self.worker.finished.connect(self.download_thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.download_thread.finished.connect(self.download_thread.deleteLater)
-
-        self.download_thread.start()
-
-    def update_download_progress(self, message):
-        self.show_status(message, "info")
-
-    def download_finished(self, success, result, filename):
-        # --- Animate download button fade in ---
+        self.download_queue.enqueue(url, self.folder_path, **self.download_options())
+
+        # --- Pulse download button to acknowledge the queued job ---
+        if self.download_anim is None:
+            return
         self.download_anim.stop()
         self.download_anim.setStartValue(0.5)
         self.download_anim.setEndValue(1.0)
         self.download_anim.start()
-        self.download_btn.setEnabled(True)
-        self.download_btn.setIcon(QIcon("icons/download.svg"))
-        self.download_btn.setText(" Download Image")
-        self.paste_btn.setEnabled(True)
 
+    def download_options(self):
+        return {
+            # Get custom filename if provided
+            "custom_filename": self.filename_input.text().strip() or None,
+            "output_format": self.output_format,
+            "dedup_mode": self.dedup_mode,
+            "skip_known_urls": self.skip_known_urls,
+            "use_http_cache": self.use_http_cache,
+            "use_preflight": self.use_preflight,
+            "max_image_bytes": self.max_image_mb * 1024 * 1024,
+        }
+
+    def apply_concurrency_settings(self):
+        configure_retries(self.max_retries)
+        configure_rate_limits(self.host_max_concurrent, self.host_requests_per_second)
+        self.download_queue.set_max_per_host(self.host_max_concurrent)
+        self.download_queue.set_max_concurrent(self.max_concurrent_downloads)
+        engine = self.download_queue.set_engine(
+            self.download_engine, self.async_max_in_flight
+        )
+        # Never let workers queue up behind a pool smaller than the worker count
+        configure_pool(max(self.connection_pool_size, self.max_concurrent_downloads))
+        return engine
+
+    def open_batch_import(self):
+        dialog = BatchImportDialog(
+            self,
+            output_format=self.output_format,
+            max_dimension=self.batch_max_dimension,
+            strip_metadata=self.batch_strip_metadata,
+            quality=self.batch_quality,
+        )
+        if dialog.exec():
+            transform = dialog.transform_options()
+            # The choices apply to this batch only; the size, quality and
+            # metadata ones are kept as the dialog's defaults for the next one
+            self.batch_max_dimension = transform["max_dimension"]
+            self.batch_strip_metadata = transform["strip_metadata"]
+            self.batch_quality = transform["quality"] or 0
+            self.settings_writer.schedule()
+            self.enqueue_urls(dialog.urls(), **transform)
+
+    def import_url_file(self, path):
+        try:
+            urls = load_url_file(path)
+        except OSError as e:
+            self.show_status(
+                f"{IconProvider.get('error')} Could not read URL list: {e}", "error"
+            )
+            return
+        self.enqueue_urls(urls)
+
+    def enqueue_urls(self, urls, **overrides):
+        if not urls:
+            self.show_status(
+                f"{IconProvider.get('warning')} No valid image URLs found", "error"
+            )
+            return
+        if not self.folder_path:
+            self.show_status(
+                f"{IconProvider.get('warning')} Please select a download folder",
+                "error",
+            )
+            return
+        self.download_queue.enqueue_many(
+            urls, self.folder_path, **{**self.download_options(), **overrides}
+        )
+        self.show_status(
+            f"{IconProvider.get('queue')} Queued {len(urls)} URLs for download",
+            "info",
+        )
+
+    def update_download_progress(self, job_ids):
+        # At most one call per frame; only the most recent report is shown,
+        # and a fade already under way is left to finish rather than restarted
+        job = self.download_queue.jobs[job_ids[-1]]
+        message = job.message
+        if job.transfer is not None:
+            message += f" {describe_transfer(job.transfer)}"
+        self.show_status(message, "info", restart_animation=False)
+
+    def update_queue_state(self):
+        active = self.download_queue.active_count()
+        pending = self.download_queue.pending_count()
+        get_metrics().set_queue_depth(pending, active)
+        # Live numbers only tick while there is something to measure
+        if active or pending:
+            if not self.metrics_timer.isActive():
+                self.metrics_timer.start()
+        else:
+            self.metrics_timer.stop()
+            self.update_metrics()
+        if active or pending:
+            self.download_btn.setText(
+                f" Download Image ({active} active, {pending} queued)"
+            )
+        else:
+            self.download_btn.setText(" Download Image")
+
+    def download_finished(self, job_id, success, result, filename):
+        job = self.download_queue.jobs[job_id]
+        attempts = job.attempts
         if success:
             self.downloaded_file_path = result
+            self.gallery_model.add(result, job.content_hash)
             self.show_status(
                 f"{IconProvider.get('check')} Successfully downloaded: {filename}",
                 "success",
             )
-            self.add_to_history(f"{IconProvider.get('check')} {filename}")
+            self.add_to_history(history_message(True, filename, attempts), success=True)
         else:
             self.show_status(
                 f"{IconProvider.get('error')} Download failed: {result}", "error"
             )
-            self.add_to_history(f"{IconProvider.get('error')} Failed: {result}")
+            self.add_to_history(history_message(False, result, attempts), success=False)
 
-    def add_to_history(self, message):
-        from datetime import datetime
+    def update_metrics(self):
+        stats = get_metrics().snapshot()
+        if not (stats["completed"] or stats["active"]):
+            self.metrics_label.setText("No downloads measured yet")
+            self.metrics_label.setToolTip("")
+            return
+        text = (
+            f"{stats['recent_mb_per_s']:.2f} MB/s · {stats['active']} active · "
+            f"{stats['queued']} queued\n{stats['completed'] - stats['failed']} done"
+        )
+        if stats["failed"]:
+            text += f", {stats['failed']} failed"
+        details = []
+        if stats["total_p50"] is not None:
+            text += f" · p50 {stats['total_p50']:.2f}s · p95 {stats['total_p95']:.2f}s"
+            for name, label in (
+                ("total", "Total"),
+                ("ttfb", "First byte"),
+                ("transfer", "Transfer"),
+                ("transform", "Transform"),
+            ):
+                if stats[f"{name}_p50"] is not None:
+                    details.append(
+                        f"{label}: p50 {stats[f'{name}_p50']:.3f}s, "
+                        f"p95 {stats[f'{name}_p95']:.3f}s"
+                    )
+        details.append(f"Over the last {stats['window']} downloads")
+        self.metrics_label.setText(text)
+        self.metrics_label.setToolTip("\n".join(details))
+
+    def export_metrics(self):
+        path, selected = QFileDialog.getSaveFileName(
+            self,
+            "Export Metrics",
+            os.path.join(self.folder_path or "", "pixora-metrics.json"),
+            "JSON (*.json);;CSV (*.csv)",
+        )
+        if not path:
+            return
+        if not path.lower().endswith((".json", ".csv")):
+            path += ".csv" if selected.startswith("CSV") else ".json"
+        try:
+            get_metrics().export(path)
+        except OSError as e:
+            self.show_status(
+                f"{IconProvider.get('error')} Could not export metrics: {e}", "error"
+            )
+            return
+        self.show_status(
+            f"{IconProvider.get('save')} Metrics saved to {os.path.basename(path)}",
+            "success",
+        )
 
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        current_text = self.history_text.toPlainText()
-        if current_text == "No downloads yet...":
-            new_text = f"[{timestamp}] {message}"
-        else:
-            new_text = f"{current_text}\n[{timestamp}] {message}"
-        self.history_text.setPlainText(new_text)
-        # Auto-scroll to bottom - Fixed cursor issue
-        cursor = self.history_text.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.history_text.setTextCursor(cursor)
-
-    def show_status(self, message, status_type="info"):
-        colors = {
-            "info": ("#3498DB", "#E3F2FD"),
-            "success": ("#27AE60", "#E8F5E8"),
-            "error": ("#E74C3C", "#FFEEAA"),
-            "warning": ("#F39C12", "#FFF3E0"),
-        }
+    def show_queue_menu(self, pos):
+        index = self.queue_view.indexAt(pos)
+        if not index.isValid():
+            return
+        job_id = index.data(QueueModel.JobIdRole)
+        job = self.download_queue.jobs[job_id]
+        menu = QMenu()
+        cancel_action = menu.addAction(
+            f"{IconProvider.get('cancel')} Cancel",
+            lambda: self.download_queue.cancel(job_id),
+        )
+        cancel_action.setEnabled(job.status in ("queued", "running"))
+        retry_action = menu.addAction(
+            f"{IconProvider.get('auto')} Retry",
+            lambda: self.download_queue.retry(job_id),
+        )
+        retry_action.setEnabled(job.status in ("failed", "cancelled"))
+        menu.exec(self.queue_view.viewport().mapToGlobal(pos))
 
-        color, bg_color = colors.get(status_type, colors["info"])
+    def add_to_history(self, message, success=True):
+        self.history_model.add(message, success)
 
+    def show_status(self, message, status_type="info", restart_animation=True):
+        if status_type not in STATUS_COLORS:
+            status_type = "info"
         self.status_label.setText(message)
-        self.status_label.setStyleSheet(
-            f"""
-            QLabel {{
-                color: {color};
-                font-size: 14px;
-                padding: 12px;
-                background: {bg_color};
-                border-radius: 6px;
-                border-left: 4px solid {color};
-                font-weight: 600;
-            }}
-        """
-        )
+        set_style_state(self.status_label, "status", status_type)
         # --- Animate status label opacity ---
+        if self.status_anim is None:
+            return
+        running = self.status_anim.state() == QPropertyAnimation.Running
+        if running and not restart_animation:
+            return
         self.status_anim.stop()
         self.status_opacity.setOpacity(0.0)
         self.status_anim.setStartValue(0.0)
@@ -321,6 +522,13 @@ class ImageDownloaderApp(QMainWindow):
         else:
             self.show_status(f"{IconProvider.get('warning')} Folder not found", "error")
 
+    def open_gallery_item(self, index):
+        path = index.data(GalleryModel.PathRole)
+        if path and os.path.exists(path):
+            webbrowser.open(f"file://{path}")
+        else:
+            self.show_status(f"{IconProvider.get('warning')} File not found", "error")
+
     def add_context_menu(self, widget):
         widget.setContextMenuPolicy(Qt.CustomContextMenu)
 
@@ -337,8 +545,17 @@ class ImageDownloaderApp(QMainWindow):
         self.show_settings_panel()
 
     def show_settings_panel(self):
+        self.ensure_settings_panel()
         if not self.settings_panel.isVisible():
             self.settings_panel.toggle.setChecked(self.auto_download)
+            self.settings_panel.set_output_format(self.output_format)
+            self.settings_panel.concurrency_spin.setValue(self.max_concurrent_downloads)
+            self.settings_panel.set_dedup_mode(self.dedup_mode)
+            self.settings_panel.set_download_engine(self.download_engine)
+            self.settings_panel.host_concurrency_spin.setValue(self.host_max_concurrent)
+            self.settings_panel.host_rate_spin.setValue(self.host_requests_per_second)
+            self.settings_panel.retries_spin.setValue(self.max_retries)
+            self.settings_panel.size_limit_spin.setValue(self.max_image_mb)
             self.overlay.show()
             self.overlay.raise_()
             self.settings_panel.setParent(self)
@@ -357,6 +574,8 @@ class ImageDownloaderApp(QMainWindow):
             self._settings_anim = anim
 
     def close_settings_panel(self):
+        if self.settings_panel is None:
+            return
         if self.settings_panel.isVisible():
             # Animate slide-out
             anim = QPropertyAnimation(self.settings_panel, b"pos")
@@ -371,12 +590,34 @@ class ImageDownloaderApp(QMainWindow):
             self.overlay.hide()
             self.settings_panel.hide()
 
-    def handle_settings_save(self, auto_download):
-        self.auto_download = auto_download
-        save_settings(self)
+    def handle_settings_save(self, values):
+        self.auto_download = values["auto_download"]
+        self.output_format = values["output_format"]
+        self.max_concurrent_downloads = values["max_concurrent"]
+        self.dedup_mode = values["dedup_mode"]
+        self.download_engine = values["download_engine"]
+        self.host_max_concurrent = values["host_max_concurrent"]
+        self.host_requests_per_second = values["host_requests_per_second"]
+        self.max_retries = values["max_retries"]
+        self.max_image_mb = values["max_image_mb"]
+        engine = self.apply_concurrency_settings()
+        self.settings_writer.save_now()
         self.close_settings_panel()
+        if engine != self.download_engine:
+            self.show_status(
+                f"{IconProvider.get('warning')} Settings saved, but the asyncio "
+                "engine needs aiohttp; using threads",
+                "error",
+            )
+            return
         self.show_status(f"{IconProvider.get('check')} Settings saved", "success")
 
+    def closeEvent(self, event):
+        self.download_queue.shutdown()
+        shutdown_thumbnailer()
+        shutdown_transform_pool()
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.overlay:
@@ -386,4 +627,4 @@ class ImageDownloaderApp(QMainWindow):
             self.settings_panel.move(self.width() - self.settings_panel.width(), 0)
 
     def on_filename_change(self):
-        save_settings(self)
+        self.settings_writer.schedule()
@@ -0,0 +1,425 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from downloader.batch import load_urls, read_url_text
+from downloader.conversion import OUTPUT_FORMATS
+from downloader.transform import (
+    shutdown_transform_pool,
+    MAX_DIMENSION_LIMIT,
+    DEFAULT_QUALITY,
+)
+from downloader.dedup_store import DEDUP_MODES, DEDUP_HARDLINK
+from downloader.http_cache import get_http_cache
+from downloader.history_store import get_history_store
+from downloader.metrics import get_metrics
+from downloader.pipeline import DownloadTask, DEFAULT_MAX_IMAGE_BYTES
+from downloader.session import configure_pool, DEFAULT_POOL_SIZE
+from downloader.preload import preload_download_modules
+from downloader.engines import (
+    async_engine_available,
+    DOWNLOAD_ENGINES,
+    ENGINE_THREADED,
+    ENGINE_ASYNCIO,
+    DEFAULT_MAX_IN_FLIGHT,
+)
+from downloader.retry import configure_retries, DEFAULT_MAX_RETRIES
+from downloader.rate_limiter import (
+    configure_rate_limits,
+    DEFAULT_HOST_CONCURRENCY,
+    DEFAULT_HOST_RPS,
+)
+
+DEFAULT_JOBS = 4
+
+# Headless entry point: only the Qt-free downloader package is imported, so
+# this runs on servers without a display and starts without loading PySide6
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="pixora-cli", description="Download images without the Pixora GUI."
+    )
+    parser.add_argument("urls", nargs="*", help="image URLs to download")
+    parser.add_argument(
+        "-i",
+        "--input",
+        metavar="FILE",
+        help="read URLs from a .txt/.csv file ('-' reads stdin)",
+    )
+    parser.add_argument(
+        "-o", "--output", default=".", metavar="DIR", help="download folder"
+    )
+    parser.add_argument(
+        "-t",
+        "--template",
+        metavar="TEMPLATE",
+        help="filename template using {index}, {name} and {host}",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        metavar="N",
+        help=f"parallel downloads (default {DEFAULT_JOBS}, "
+        f"or {DEFAULT_MAX_IN_FLIGHT} with --engine asyncio)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=DOWNLOAD_ENGINES,
+        default=ENGINE_THREADED,
+        help="one thread per download, or one asyncio event loop for all of them",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_HOST_CONCURRENCY,
+        metavar="N",
+        help="at most N simultaneous requests to any one host",
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=DEFAULT_HOST_RPS,
+        metavar="R",
+        help="at most R requests per second to any one host (0: no limit)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        metavar="N",
+        help="retry timeouts, dropped connections and 5xx/429 up to N times",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(OUTPUT_FORMATS),
+        help="re-encode images to this format instead of keeping original bytes",
+    )
+    parser.add_argument(
+        "--max-dimension",
+        type=int,
+        default=0,
+        metavar="PX",
+        help="downscale images whose width or height exceeds PX",
+    )
+    parser.add_argument(
+        "--quality",
+        type=int,
+        metavar="Q",
+        help="JPEG/WebP encoder quality (1-100) when re-encoding, "
+        f"{DEFAULT_QUALITY} if not given; setting it forces a re-encode",
+    )
+    parser.add_argument(
+        "--strip-metadata",
+        action="store_true",
+        help="drop EXIF and ICC data (orientation is applied to the pixels)",
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=DEDUP_MODES,
+        default=DEDUP_HARDLINK,
+        help="what to do with images whose content was downloaded before",
+    )
+    parser.add_argument(
+        "--skip-known-urls",
+        action="store_true",
+        help="reuse earlier downloads of the same URL without any network request",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="do not revalidate earlier downloads with ETag/Last-Modified",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="skip the HEAD/Range check that rejects non-images before downloading",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="do not record the downloads in the history database",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=float,
+        default=DEFAULT_MAX_IMAGE_BYTES / (1024 * 1024),
+        metavar="MB",
+        help="reject images larger than this many MB (0: no limit)",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="print one JSON object per download"
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="write per-download timings and p50/p95 summary to FILE "
+        "(.csv for CSV, JSON otherwise)",
+    )
+    cache_group = parser.add_argument_group("HTTP cache inspection")
+    cache_group.add_argument(
+        "--cache-stats", action="store_true", help="print cache size and exit"
+    )
+    cache_group.add_argument(
+        "--list-cache",
+        type=int,
+        nargs="?",
+        const=100,
+        metavar="N",
+        help="print the N most recently used cache entries as JSON and exit",
+    )
+    cache_group.add_argument(
+        "--clear-cache", action="store_true", help="empty the cache and exit"
+    )
+    history_group = parser.add_argument_group("download history inspection")
+    history_group.add_argument(
+        "--history-stats",
+        action="store_true",
+        help="print download counts by status and exit",
+    )
+    history_group.add_argument(
+        "--list-history",
+        type=int,
+        nargs="?",
+        const=100,
+        metavar="N",
+        help="print the N most recent downloads as JSON and exit",
+    )
+    history_group.add_argument(
+        "--was-downloaded",
+        metavar="URL",
+        help="print the last successful download of URL as JSON and exit "
+        "(exit status 1 if there is none)",
+    )
+    history_group.add_argument(
+        "--clear-history", action="store_true", help="empty the history and exit"
+    )
+    return parser
+
+
+def inspect_history(args):
+    store = get_history_store()
+    if args.clear_history:
+        store.clear()
+    if args.history_stats or args.clear_history:
+        print(json.dumps(store.stats()))
+    if args.list_history is not None:
+        for entry in store.page(limit=args.list_history):
+            print(json.dumps(entry, ensure_ascii=False))
+    if args.was_downloaded:
+        entry = store.was_downloaded(args.was_downloaded)
+        print(json.dumps(entry, ensure_ascii=False))
+        return 0 if entry else 1
+    return 0
+
+
+def inspect_cache(args):
+    cache = get_http_cache()
+    if args.clear_cache:
+        cache.clear()
+    if args.cache_stats or args.clear_cache:
+        print(json.dumps(cache.stats()))
+    if args.list_cache is not None:
+        for entry in cache.entries(args.list_cache):
+            print(json.dumps(entry, ensure_ascii=False))
+
+
+def collect_urls(args):
+    text = "\n".join(args.urls)
+    if args.input:
+        text += "\n" + read_url_text(args.input)
+    elif not args.urls and not sys.stdin.isatty():
+        text = sys.stdin.read()
+    return load_urls(text)
+
+
+def render_filename(template, index, url):
+    if not template:
+        return None
+    parsed = urlparse(url)
+    name = os.path.splitext(os.path.basename(parsed.path))[0] or "pixora_image"
+    return template.format(index=index, name=name, host=parsed.hostname or "")
+
+
+def make_task(task_class, index, url, args):
+    return task_class(
+        url,
+        args.output,
+        custom_filename=render_filename(args.template, index, url),
+        output_format=args.format,
+        dedup_mode=args.dedup,
+        skip_known_urls=args.skip_known_urls,
+        use_http_cache=not args.no_cache,
+        use_preflight=not args.no_preflight,
+        max_image_bytes=int(args.max_size * 1024 * 1024),
+        record_history=not args.no_history,
+        max_dimension=args.max_dimension,
+        strip_metadata=args.strip_metadata,
+        quality=args.quality,
+    )
+
+
+def task_result(index, url, task, started, saved=None, error=None):
+    result = {"index": index, "url": url, "attempts": task.attempts}
+    if error is None:
+        save_path, filename = saved
+        result.update(
+            ok=True,
+            path=save_path,
+            filename=filename,
+            outcome=task.outcome,
+            sha256=task.saved_hash(),
+            size=task.size,
+        )
+        if task.transformed:
+            # task.size and content_hash describe the bytes as served
+            result.update(
+                size=os.path.getsize(save_path),
+                source_sha256=task.content_hash,
+                source_size=task.size,
+            )
+    else:
+        result.update(ok=False, error=str(error))
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def download_one(index, url, args):
+    started = time.monotonic()
+    task = make_task(DownloadTask, index, url, args)
+    try:
+        saved = task.run()
+    except Exception as e:
+        return task_result(index, url, task, started, error=e)
+    return task_result(index, url, task, started, saved=saved)
+
+
+def run_threaded(urls, args):
+    configure_pool(max(DEFAULT_POOL_SIZE, args.jobs))
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            pool.submit(download_one, index, url, args)
+            for index, url in enumerate(urls, 1)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_asyncio(urls, args):
+    # Keeps at most --jobs coroutines on the engine so a 100k-URL list does
+    # not open 100k .part files at once. aiohttp is only imported here, so
+    # threaded runs and the inspection commands start without it.
+    from downloader.async_engine import (
+        AsyncDownloadTask,
+        get_async_engine,
+        shutdown_async_engine,
+    )
+
+    engine = get_async_engine()
+    engine.reserve(args.jobs)
+    numbered = enumerate(urls, 1)
+    pending = {}
+    try:
+        while True:
+            for index, url in itertools.islice(numbered, args.jobs - len(pending)):
+                task = make_task(AsyncDownloadTask, index, url, args)
+                future = engine.submit(task)
+                pending[future] = (index, url, task, time.monotonic())
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, url, task, started = pending.pop(future)
+                if error := future.exception():
+                    yield task_result(index, url, task, started, error=error)
+                else:
+                    yield task_result(index, url, task, started, saved=future.result())
+    finally:
+        shutdown_async_engine()
+
+
+def report(result, as_json):
+    if as_json:
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    elif result["ok"]:
+        print(f"OK   {result['url']} -> {result['path']}", flush=True)
+    else:
+        print(f"FAIL {result['url']}: {result['error']}", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.cache_stats or args.clear_cache or args.list_cache is not None:
+        inspect_cache(args)
+        return 0
+    if (
+        args.history_stats
+        or args.clear_history
+        or args.was_downloaded
+        or args.list_history is not None
+    ):
+        return inspect_history(args)
+    if args.engine == ENGINE_ASYNCIO and not async_engine_available():
+        parser.error("--engine asyncio requires the aiohttp package")
+    if args.jobs is None:
+        args.jobs = (
+            DEFAULT_MAX_IN_FLIGHT if args.engine == ENGINE_ASYNCIO else DEFAULT_JOBS
+        )
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.max_size < 0:
+        parser.error("--max-size must not be negative")
+    if not 0 <= args.max_dimension <= MAX_DIMENSION_LIMIT:
+        parser.error(f"--max-dimension must be between 0 and {MAX_DIMENSION_LIMIT}")
+    if args.quality is not None and not 1 <= args.quality <= 100:
+        parser.error("--quality must be between 1 and 100")
+    if args.retries < 0:
+        parser.error("--retries must not be negative")
+    if args.per_host < 1 or args.rps < 0:
+        parser.error("--per-host must be at least 1 and --rps not negative")
+    if args.template:
+        try:
+            render_filename(args.template, 0, "https://example.com/x.png")
+        except (KeyError, IndexError, ValueError) as e:
+            parser.error(f"invalid --template: {e}")
+    try:
+        urls = collect_urls(args)
+    except OSError as e:
+        parser.error(str(e))
+    if not urls:
+        parser.error("no valid image URLs given")
+    os.makedirs(args.output, exist_ok=True)
+    configure_rate_limits(args.per_host, args.rps)
+    configure_retries(args.retries)
+    preload_download_modules(args.engine)
+
+    run = run_asyncio if args.engine == ENGINE_ASYNCIO else run_threaded
+    failed = 0
+    remaining = len(urls)
+    metrics = get_metrics()
+    try:
+        for result in run(urls, args):
+            failed += not result["ok"]
+            remaining -= 1
+            active = min(args.jobs, remaining)
+            metrics.set_queue_depth(remaining - active, active)
+            report(result, args.json)
+    finally:
+        shutdown_transform_pool()
+    if args.metrics:
+        try:
+            metrics.export(args.metrics)
+        except OSError as e:
+            print(f"could not write metrics: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
+import os
 import json
 from pathlib import Path
+from utils.debounce import Debouncer
 
 CONFIG_PATH = Path.home() / ".image_downloader_config.json"
+# Keystroke-driven changes reach the disk at most this often
+SAVE_INTERVAL_MS = 500
 
 
 def load_settings(app_instance):
@@ -19,6 +23,45 @@ def apply_loaded_settings(app_instance, f):
     app_instance.folder_path = config.get("folder_path", "")
     app_instance.auto_download = config.get("auto_download", False)
     app_instance.custom_filename = config.get("custom_filename", "")
+    app_instance.output_format = config.get("output_format", "")
+    app_instance.max_concurrent_downloads = config.get(
+        "max_concurrent_downloads", app_instance.max_concurrent_downloads
+    )
+    app_instance.connection_pool_size = config.get(
+        "connection_pool_size", app_instance.connection_pool_size
+    )
+    app_instance.dedup_mode = config.get("dedup_mode", app_instance.dedup_mode)
+    app_instance.skip_known_urls = config.get(
+        "skip_known_urls", app_instance.skip_known_urls
+    )
+    app_instance.use_http_cache = config.get(
+        "use_http_cache", app_instance.use_http_cache
+    )
+    app_instance.http_cache_max_entries = config.get(
+        "http_cache_max_entries", app_instance.http_cache_max_entries
+    )
+    app_instance.download_engine = config.get(
+        "download_engine", app_instance.download_engine
+    )
+    app_instance.async_max_in_flight = config.get(
+        "async_max_in_flight", app_instance.async_max_in_flight
+    )
+    app_instance.host_max_concurrent = config.get(
+        "host_max_concurrent", app_instance.host_max_concurrent
+    )
+    app_instance.host_requests_per_second = config.get(
+        "host_requests_per_second", app_instance.host_requests_per_second
+    )
+    app_instance.max_retries = config.get("max_retries", app_instance.max_retries)
+    app_instance.use_preflight = config.get("use_preflight", app_instance.use_preflight)
+    app_instance.max_image_mb = config.get("max_image_mb", app_instance.max_image_mb)
+    app_instance.batch_max_dimension = config.get(
+        "batch_max_dimension", app_instance.batch_max_dimension
+    )
+    app_instance.batch_strip_metadata = config.get(
+        "batch_strip_metadata", app_instance.batch_strip_metadata
+    )
+    app_instance.batch_quality = config.get("batch_quality", app_instance.batch_quality)
     app_instance.update_folder_label()
     app_instance.filename_input.setText(app_instance.custom_filename)
 
@@ -28,9 +71,55 @@ def save_settings(app_instance):
         "folder_path": app_instance.folder_path,
         "auto_download": app_instance.auto_download,
         "custom_filename": app_instance.filename_input.text().strip(),
+        "output_format": app_instance.output_format,
+        "max_concurrent_downloads": app_instance.max_concurrent_downloads,
+        "connection_pool_size": app_instance.connection_pool_size,
+        "dedup_mode": app_instance.dedup_mode,
+        "skip_known_urls": app_instance.skip_known_urls,
+        "use_http_cache": app_instance.use_http_cache,
+        "http_cache_max_entries": app_instance.http_cache_max_entries,
+        "download_engine": app_instance.download_engine,
+        "async_max_in_flight": app_instance.async_max_in_flight,
+        "host_max_concurrent": app_instance.host_max_concurrent,
+        "host_requests_per_second": app_instance.host_requests_per_second,
+        "max_retries": app_instance.max_retries,
+        "use_preflight": app_instance.use_preflight,
+        "max_image_mb": app_instance.max_image_mb,
+        "batch_max_dimension": app_instance.batch_max_dimension,
+        "batch_strip_metadata": app_instance.batch_strip_metadata,
+        "batch_quality": app_instance.batch_quality,
     }
+    temp_path = CONFIG_PATH.with_name(f"{CONFIG_PATH.name}.tmp")
     try:
-        with open(CONFIG_PATH, "w") as f:
+        # Written aside and swapped in, so a crash mid-write keeps the old file
+        with open(temp_path, "w") as f:
             json.dump(config, f)
+        os.replace(temp_path, CONFIG_PATH)
     except Exception as e:
         print("Error saving settings:", e)
+
+
+class SettingsWriter:
+    # Write-behind for the config file: schedule() only marks it dirty and
+    # the file is rewritten at most once per interval; flush() writes any
+    # pending change right away and is called when the app quits
+    def __init__(self, app_instance, interval_ms=SAVE_INTERVAL_MS):
+        self.app_instance = app_instance
+        self._dirty = False
+        self._debouncer = Debouncer(
+            interval_ms, self.flush, app_instance, restart=False
+        )
+
+    def schedule(self):
+        self._dirty = True
+        self._debouncer.trigger()
+
+    def save_now(self):
+        self._dirty = True
+        self.flush()
+
+    def flush(self):
+        self._debouncer.cancel()
+        if self._dirty:
+            self._dirty = False
+            save_settings(self.app_instance)
@@ -6,16 +6,84 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QGraphicsDropShadowEffect,
     QFrame,
+    QComboBox,
+    QSpinBox,
+    QDoubleSpinBox,
 )
-from PySide6.QtSvgWidgets import QSvgWidget
 from PySide6.QtGui import QColor, QPainter, QPainterPath, QCursor, QIcon
 from PySide6.QtCore import Qt, QSize
 from toggle_switch import ToggleSwitch
 from icon_provider import IconProvider
 
 
+OUTPUT_FORMAT_CHOICES = [
+    ("Keep original (no re-encoding)", ""),
+    ("PNG", "png"),
+    ("JPEG", "jpeg"),
+    ("WebP", "webp"),
+    ("BMP", "bmp"),
+    ("GIF", "gif"),
+]
+
+
+COMBO_STYLE = """
+    QComboBox {
+        padding: 6px 10px;
+        border: 2px solid #E0E0E0;
+        border-radius: 6px;
+        font-size: 14px;
+        background: white;
+        color: #2C3E50;
+    }
+    QComboBox:focus {
+        border-color: #3498DB;
+    }
+"""
+
+SPIN_STYLE = """
+    QSpinBox, QDoubleSpinBox {
+        padding: 6px 10px;
+        border: 2px solid #E0E0E0;
+        border-radius: 6px;
+        font-size: 14px;
+        background: white;
+        color: #2C3E50;
+    }
+    QSpinBox:focus, QDoubleSpinBox:focus {
+        border-color: #3498DB;
+    }
+"""
+
+ROW_LABEL_STYLE = "font-size: 16px; color: #2C3E50; font-weight: 600;"
+
+DEDUP_MODE_CHOICES = [
+    ("Hardlink to existing file", "hardlink"),
+    ("Skip (reuse existing file)", "skip"),
+    ("Always save a new copy", "off"),
+]
+
+DOWNLOAD_ENGINE_CHOICES = [
+    ("Threads (one per download)", "threaded"),
+    ("Asyncio (single event loop)", "asyncio"),
+]
+
+
 class SettingsPanel(QWidget):
-    def __init__(self, parent=None, auto_download=False, on_save=None, on_close=None):
+    def __init__(
+        self,
+        parent=None,
+        auto_download=False,
+        output_format="",
+        max_concurrent=4,
+        dedup_mode="hardlink",
+        download_engine="threaded",
+        host_max_concurrent=6,
+        host_requests_per_second=10.0,
+        max_retries=3,
+        max_image_mb=100,
+        on_save=None,
+        on_close=None,
+    ):
         super().__init__(parent)
         self.on_save = on_save
         self.on_close = on_close
@@ -34,10 +102,31 @@ class SettingsPanel(QWidget):
         """
         )
 
-        self._init_ui(auto_download)
+        self._init_ui(
+            auto_download,
+            output_format,
+            max_concurrent,
+            dedup_mode,
+            download_engine,
+            host_max_concurrent,
+            host_requests_per_second,
+            max_retries,
+            max_image_mb,
+        )
         self._add_shadow()
 
-    def _init_ui(self, auto_download):
+    def _init_ui(
+        self,
+        auto_download,
+        output_format,
+        max_concurrent,
+        dedup_mode,
+        download_engine,
+        host_max_concurrent,
+        host_requests_per_second,
+        max_retries,
+        max_image_mb,
+    ):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(30, 30, 30, 30)
         layout.setSpacing(24)
@@ -45,6 +134,15 @@ class SettingsPanel(QWidget):
         layout.addLayout(self._build_header())
         layout.addWidget(self._divider())
         layout.addLayout(self._build_toggle_row(auto_download))
+        layout.addLayout(self._build_format_row(output_format))
+        layout.addLayout(self._build_concurrency_row(max_concurrent))
+        layout.addLayout(
+            self._build_host_limit_row(host_max_concurrent, host_requests_per_second)
+        )
+        layout.addLayout(self._build_retries_row(max_retries))
+        layout.addLayout(self._build_size_limit_row(max_image_mb))
+        layout.addLayout(self._build_dedup_row(dedup_mode))
+        layout.addLayout(self._build_engine_row(download_engine))
         layout.addStretch()
         layout.addWidget(self._build_save_button())
 
@@ -86,24 +184,111 @@ class SettingsPanel(QWidget):
         header.addWidget(close_btn)
         return header
 
-    def _build_toggle_row(self, auto_download):
+    def _build_row(self, icon_name, text, *widgets):
         row = QHBoxLayout()
         row.setSpacing(12)
 
-        if icon_path := IconProvider.get_path("download"):
+        if icon_path := IconProvider.get_path(icon_name):
             icon = self._svg_icon(icon_path, 16)
         else:
             icon = QWidget()
             icon.setFixedSize(16, 16)
-        label = QLabel("Auto-download when valid URL is detected")
-        label.setStyleSheet("font-size: 16px; color: #2C3E50; font-weight: 600;")
+        label = QLabel(text)
+        label.setStyleSheet(ROW_LABEL_STYLE)
+        # Long labels wrap rather than push the controls out of the panel
+        label.setWordWrap(True)
+
+        row.addWidget(icon)
+        row.addWidget(label, 1)
+        for widget in widgets:
+            row.addWidget(widget)
+        return row
 
+    def _build_toggle_row(self, auto_download):
         self.toggle = ToggleSwitch()
         self.toggle.setChecked(auto_download)
+        return self._build_row(
+            "download", "Auto-download when valid URL is detected", self.toggle
+        )
 
-        self._add_icon_and_label_to_layout(row, icon, label)
-        row.addWidget(self.toggle)
-        return row
+    def _build_format_row(self, output_format):
+        self.format_combo = self._combo(OUTPUT_FORMAT_CHOICES)
+        self.set_output_format(output_format)
+        return self._build_row("save", "Save format", self.format_combo)
+
+    def _build_concurrency_row(self, max_concurrent):
+        self.concurrency_spin = self._spin(1, 16, max_concurrent)
+        return self._build_row(
+            "download", "Simultaneous downloads", self.concurrency_spin
+        )
+
+    def _build_host_limit_row(self, host_max_concurrent, host_requests_per_second):
+        self.host_concurrency_spin = self._spin(
+            1, 64, host_max_concurrent, suffix=" conn"
+        )
+        self.host_rate_spin = QDoubleSpinBox()
+        self.host_rate_spin.setRange(0, 1000)
+        self.host_rate_spin.setDecimals(1)
+        self.host_rate_spin.setSuffix(" req/s")
+        # 0 disables the requests-per-second limit
+        self.host_rate_spin.setSpecialValueText("No req/s limit")
+        self.host_rate_spin.setValue(host_requests_per_second)
+        self.host_rate_spin.setStyleSheet(SPIN_STYLE)
+        return self._build_row(
+            "link", "Per host", self.host_concurrency_spin, self.host_rate_spin
+        )
+
+    def _build_retries_row(self, max_retries):
+        self.retries_spin = self._spin(0, 10, max_retries)
+        return self._build_row("auto", "Retries for network errors", self.retries_spin)
+
+    def _build_size_limit_row(self, max_image_mb):
+        self.size_limit_spin = self._spin(
+            0, 10000, max_image_mb, suffix=" MB", special="No limit"
+        )
+        return self._build_row(
+            "image", "Largest image to download", self.size_limit_spin
+        )
+
+    def _build_dedup_row(self, dedup_mode):
+        self.dedup_combo = self._combo(DEDUP_MODE_CHOICES)
+        self.set_dedup_mode(dedup_mode)
+        return self._build_row("paste", "Duplicate images", self.dedup_combo)
+
+    def _build_engine_row(self, download_engine):
+        self.engine_combo = self._combo(DOWNLOAD_ENGINE_CHOICES)
+        self.set_download_engine(download_engine)
+        return self._build_row("settings", "Download engine", self.engine_combo)
+
+    def _combo(self, choices):
+        combo = QComboBox()
+        for text, value in choices:
+            combo.addItem(text, value)
+        combo.setCursor(QCursor(Qt.PointingHandCursor))
+        combo.setStyleSheet(COMBO_STYLE)
+        return combo
+
+    def _spin(self, minimum, maximum, value, suffix="", special=""):
+        spin = QSpinBox()
+        spin.setRange(minimum, maximum)
+        spin.setSuffix(suffix)
+        # Shown instead of the minimum, e.g. "No limit" for 0
+        spin.setSpecialValueText(special)
+        spin.setValue(value)
+        spin.setStyleSheet(SPIN_STYLE)
+        return spin
+
+    def set_download_engine(self, download_engine):
+        index = self.engine_combo.findData(download_engine)
+        self.engine_combo.setCurrentIndex(max(index, 0))
+
+    def set_dedup_mode(self, dedup_mode):
+        index = self.dedup_combo.findData(dedup_mode)
+        self.dedup_combo.setCurrentIndex(max(index, 0))
+
+    def set_output_format(self, output_format):
+        index = self.format_combo.findData(output_format or "")
+        self.format_combo.setCurrentIndex(max(index, 0))
 
     def _add_icon_and_label_to_layout(self, layout, icon, label):
         layout.addWidget(icon)
@@ -149,6 +334,7 @@ class SettingsPanel(QWidget):
 
     def _svg_icon(self, path, size):
         import os
+        from PySide6.QtSvgWidgets import QSvgWidget
 
         if not os.path.exists(path):
             # Return an empty widget if icon doesn't exist
@@ -192,7 +378,19 @@ class SettingsPanel(QWidget):
 
     def handle_save(self):
         if self.on_save:
-            self.on_save(self.toggle.isChecked())
+            self.on_save(
+                {
+                    "auto_download": self.toggle.isChecked(),
+                    "output_format": self.format_combo.currentData(),
+                    "max_concurrent": self.concurrency_spin.value(),
+                    "dedup_mode": self.dedup_combo.currentData(),
+                    "download_engine": self.engine_combo.currentData(),
+                    "host_max_concurrent": self.host_concurrency_spin.value(),
+                    "host_requests_per_second": self.host_rate_spin.value(),
+                    "max_retries": self.retries_spin.value(),
+                    "max_image_mb": self.size_limit_spin.value(),
+                }
+            )
 
     def handle_close(self):
         if self.on_close:
@@ -0,0 +1,35 @@
+from PySide6.QtCore import QObject, QTimer
+
+
+class Debouncer(QObject):
+    # Collapses bursts of calls into one callback on the GUI thread.
+    # restart=True (debounce): fires once the calls stop for interval ms.
+    # restart=False (coalesce): fires at most once per interval ms, so a
+    # steady stream of calls is still flushed regularly.
+    def __init__(self, interval_ms, callback, parent=None, restart=True):
+        super().__init__(parent)
+        self.callback = callback
+        self.restart = restart
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._fire)
+
+    def trigger(self):
+        if self.restart or not self._timer.isActive():
+            self._timer.start()
+
+    def cancel(self):
+        self._timer.stop()
+
+    def is_pending(self):
+        return self._timer.isActive()
+
+    def flush(self):
+        # Runs a pending callback right away, e.g. before the app exits
+        if self._timer.isActive():
+            self._timer.stop()
+            self._fire()
+
+    def _fire(self):
+        self.callback()
@@ -0,0 +1,65 @@
+import sys
+import time
+import builtins
+import importlib.util
+
+REPORT_LIMIT = 25
+
+
+class StartupProfiler:
+    # Times every module loaded after install() by wrapping __import__, in
+    # the spirit of `python -X importtime` but usable from the app itself.
+    # "total" includes the modules a module imports, "self" does not.
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = []
+        self.imports = {}
+        self._stack = []
+        self._original_import = None
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.started))
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level:
+            try:
+                package = (globals or {}).get("__package__") or ""
+                name_key = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                name_key = name
+        else:
+            name_key = name
+        if name_key in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            self.imports[name_key] = (total, total - children)
+
+    def report(self, limit=REPORT_LIMIT):
+        lines = ["Startup timeline (ms since launch):"]
+        lines += [f"  {seconds * 1000:8.1f}  {label}" for label, seconds in self.marks]
+        # Self times do not overlap, so their sum is the time spent importing
+        spent = sum(own for _, own in self.imports.values())
+        lines.append(f"\n{len(self.imports)} modules imported in {spent * 1000:.1f} ms")
+        lines.append(f"Slowest {limit} imports (ms):")
+        lines.append(f"  {'total':>8}  {'self':>8}  module")
+        slowest = sorted(self.imports.items(), key=lambda item: -item[1][0])
+        for name, (total, own) in slowest[:limit]:
+            lines.append(f"  {total * 1000:8.1f}  {own * 1000:8.1f}  {name}")
+        return "\n".join(lines)
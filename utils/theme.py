@@ -0,0 +1,207 @@
+from utils.ui_helpers import button_colors
+
+# One stylesheet per panel, built once at import. Widgets pick their look
+# through object names and dynamic properties (variant, buttonSize, status,
+# selected) instead of carrying their own stylesheet, and state changes go
+# through set_style_state(), which re-polishes a single widget rather than
+# re-parsing a stylesheet on every call.
+
+BUTTON_VARIANTS = {
+    "primary": "#3498DB",
+    "success": "#27AE60",
+    "danger": "#E74C3C",
+    "accent": "#9B59B6",
+    "neutral": "#34495E",
+    "download": "#FF69B4",
+}
+BUTTON_SIZES = {
+    "small": "padding: 8px 16px; font-size: 13px;",
+    "large": "padding: 15px 20px; font-size: 14px;",
+}
+DEFAULT_BUTTON_SIZE = "padding: 10px 16px; font-size: 13px;"
+
+# (text/border color, background) per status_type of show_status()
+STATUS_COLORS = {
+    "info": ("#3498DB", "#E3F2FD"),
+    "success": ("#27AE60", "#E8F5E8"),
+    "error": ("#E74C3C", "#FFEEAA"),
+    "warning": ("#F39C12", "#FFF3E0"),
+}
+
+
+def _button_rules():
+    rules = []
+    for variant, color in BUTTON_VARIANTS.items():
+        _, hover, pressed = button_colors(color)
+        selector = f'QPushButton[variant="{variant}"]'
+        rules.append(
+            f"""
+    {selector} {{
+        background-color: {color};
+        color: white;
+        border: none;
+        border-radius: 6px;
+        font-weight: bold;
+        {DEFAULT_BUTTON_SIZE}
+    }}
+    {selector}:hover {{ background-color: {hover}; }}
+    {selector}:pressed {{ background-color: {pressed}; }}
+    {selector}:disabled {{ background-color: #BDC3C7; color: #7F8C8D; }}"""
+        )
+    for size, padding in BUTTON_SIZES.items():
+        rules.append(f'\n    QPushButton[buttonSize="{size}"] {{ {padding} }}')
+    return "".join(rules)
+
+
+def _status_rules():
+    return "".join(
+        f"""
+    QLabel#statusLabel[status="{status}"] {{
+        color: {color};
+        background: {background};
+        border-left-color: {color};
+        font-weight: 600;
+    }}"""
+        for status, (color, background) in STATUS_COLORS.items()
+    )
+
+
+CONTROLS_STYLESHEET = (
+    """
+    QGroupBox {
+        font-weight: bold;
+        color: #2C3E50;
+        border: 2px solid #E0E0E0;
+        border-radius: 8px;
+        margin-top: 10px;
+        padding-top: 10px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 8px 0 8px;
+        margin-top: 2px;
+    }
+    QLineEdit {
+        padding: 12px;
+        border: 2px solid #E0E0E0;
+        border-radius: 6px;
+        font-size: 14px;
+        background: white;
+        color: #2C3E50;
+    }
+    QLineEdit:focus {
+        border-color: #3498DB;
+    }
+    QComboBox {
+        padding: 6px 10px;
+        border: 2px solid #E0E0E0;
+        border-radius: 6px;
+        font-size: 14px;
+        background: white;
+        color: #2C3E50;
+    }
+    QComboBox:focus {
+        border-color: #3498DB;
+    }
+    QListView {
+        background: #F8F9FA;
+        border: 1px solid #E0E0E0;
+        border-radius: 6px;
+        padding: 4px;
+        font-size: 12px;
+        color: #2C3E50;
+    }
+    QListView#historyView {
+        padding: 8px;
+    }
+    QListView#galleryView {
+        font-size: 11px;
+    }
+    QLabel#titleLabel {
+        color: #2C3E50;
+        font-size: 24px;
+        font-weight: bold;
+        padding: 0 0 4px 0;
+        margin: 0;
+    }
+    QLabel#metricsLabel {
+        color: #7F8C8D;
+        font-size: 12px;
+        padding: 0 4px;
+    }
+    QLabel#historyEmptyLabel {
+        color: #7F8C8D;
+        font-size: 12px;
+        padding: 8px;
+    }
+    QLabel#folderLabel {
+        color: #7F8C8D;
+        font-size: 13px;
+        background: #ECF0F1;
+        padding: 10px;
+        border-radius: 6px;
+        border: 1px solid #BDC3C7;
+    }
+    QLabel#folderLabel[selected="true"] {
+        color: #27AE60;
+        font-weight: 600;
+        background: #D5F4E6;
+        border-color: #27AE60;
+    }
+    QLabel#statusLabel {
+        color: #7F8C8D;
+        font-size: 14px;
+        padding: 12px;
+        background: #ECF0F1;
+        border-radius: 6px;
+        border-left: 4px solid #3498DB;
+    }"""
+    + _status_rules()
+    + _button_rules()
+    + """
+    QPushButton#settingsButton {
+        background-color: transparent;
+        border: none;
+        border-radius: 15px;
+        padding: 0;
+        min-width: 30px;
+        min-height: 30px;
+        max-width: 30px;
+        max-height: 30px;
+    }
+    QPushButton#clearHistoryButton {
+        padding-top: 10px;
+        padding-bottom: 10px;
+    }
+"""
+)
+
+# The right panel is drawn as a white card, with tighter group titles; the
+# left one sits in a scroll area on the window background
+CARD_STYLESHEET = (
+    """
+    QWidget {
+        background-color: white;
+        border-radius: 8px;
+    }"""
+    + CONTROLS_STYLESHEET
+    + """
+    QGroupBox::title {
+        padding: 0 5px 0 5px;
+        margin-top: 0;
+    }
+"""
+)
+
+
+def set_style_state(widget, name, value):
+    # Re-polishing is what applies the new property to the stylesheet; it is
+    # skipped when nothing changed, which is the common case for a stream of
+    # status messages of one type
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
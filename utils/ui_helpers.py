@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def darken_color(color):
     color_map = {
         "#3498DB": "#2980B9",
@@ -14,6 +17,15 @@ def darken_color(color):
     return color_map.get(color, "#2C3E50")
 
 
+def button_colors(color):
+    # Special hover and pressed color for download button
+    if color.strip() == "#FF69B4":
+        return color, "#C94F8C", "#A13B6C"
+    hover_color = darken_color(color)
+    return color, hover_color, darken_color(hover_color)
+
+
+@lru_cache(maxsize=None)
 def get_button_style(color, large=False, small=False):
     size = (
         "padding: 15px 20px; font-size: 14px;"
@@ -24,13 +36,7 @@ def get_button_style(color, large=False, small=False):
             else "padding: 10px 16px; font-size: 13px;"
         )
     )
-    # Special hover and pressed color for download button
-    if color.strip() == "#FF69B4":
-        hover_color = "#C94F8C"
-        pressed_color = "#A13B6C"
-    else:
-        hover_color = darken_color(color)
-        pressed_color = darken_color(hover_color)
+    _, hover_color, pressed_color = button_colors(color)
     return f"""
         QPushButton {{
             background-color: {color};
@@ -51,33 +57,3 @@ def get_button_style(color, large=False, small=False):
             color: #7F8C8D;
         }}
     """
-
-
-def show_status(status_label, status_anim, status_opacity, message, status_type="info"):
-    colors = {
-        "info": ("#3498DB", "#E3F2FD"),
-        "success": ("#27AE60", "#E8F5E8"),
-        "error": ("#E74C3C", "#FFEEAA"),
-        "warning": ("#F39C12", "#FFF3E0"),
-    }
-    color, bg_color = colors.get(status_type, colors["info"])
-    status_label.setText(message)
-    status_label.setStyleSheet(
-        f"""
-        QLabel {{
-            color: {color};
-            font-size: 14px;
-            padding: 12px;
-            background: {bg_color};
-            border-radius: 6px;
-            border-left: 4px solid {color};
-            font-weight: 600;
-        }}
-    """
-    )
-    # --- Animate status label opacity ---
-    status_anim.stop()
-    status_opacity.setOpacity(0.0)
-    status_anim.setStartValue(0.0)
-    status_anim.setEndValue(1.0)
-    status_anim.start()
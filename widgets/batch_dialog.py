@@ -0,0 +1,178 @@
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPlainTextEdit,
+    QPushButton,
+    QFileDialog,
+    QComboBox,
+    QSpinBox,
+    QCheckBox,
+)
+from PySide6.QtGui import QCursor
+from PySide6.QtCore import Qt
+from icon_provider import IconProvider
+from utils.ui_helpers import get_button_style
+from downloader.batch import load_urls, read_url_text
+from downloader.transform import MAX_DIMENSION_LIMIT, DEFAULT_QUALITY
+from settings_panel import OUTPUT_FORMAT_CHOICES, COMBO_STYLE, SPIN_STYLE
+
+
+class BatchImportDialog(QDialog):
+    def __init__(
+        self,
+        parent=None,
+        output_format="",
+        max_dimension=0,
+        strip_metadata=False,
+        quality=0,
+    ):
+        super().__init__(parent)
+        self.setWindowTitle("Batch Import")
+        self.setMinimumSize(560, 480)
+        self.setStyleSheet("QDialog { background-color: white; }")
+        self._urls = []
+        self._init_ui()
+        self.format_combo.setCurrentIndex(
+            max(self.format_combo.findData(output_format or ""), 0)
+        )
+        self.dimension_spin.setValue(max_dimension or 0)
+        self.strip_check.setChecked(bool(strip_metadata))
+        self.quality_spin.setValue(quality or 0)
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        hint = QLabel(
+            "Paste image URLs below (one per line, or CSV), or load a .txt/.csv "
+            "file. Duplicates and non-HTTP entries are skipped."
+        )
+        hint.setWordWrap(True)
+        hint.setStyleSheet("font-size: 13px; color: #2C3E50;")
+        layout.addWidget(hint)
+
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setPlaceholderText("https://example.com/image1.jpg\n...")
+        self.text_edit.setStyleSheet(
+            """
+            QPlainTextEdit {
+                padding: 8px;
+                border: 2px solid #E0E0E0;
+                border-radius: 6px;
+                font-size: 13px;
+                background: white;
+                color: #2C3E50;
+            }
+            QPlainTextEdit:focus {
+                border-color: #3498DB;
+            }
+        """
+        )
+        layout.addWidget(self.text_edit)
+
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("font-size: 12px; color: #7F8C8D;")
+        layout.addWidget(self.count_label)
+        layout.addLayout(self._build_transform_rows())
+
+        buttons = QHBoxLayout()
+        load_btn = QPushButton(f"{IconProvider.get('folder_open')} Load File...")
+        load_btn.clicked.connect(self.load_file)
+        load_btn.setStyleSheet(get_button_style("#34495E"))
+        load_btn.setCursor(QCursor(Qt.PointingHandCursor))
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        cancel_btn.setStyleSheet(get_button_style("#E74C3C"))
+        cancel_btn.setCursor(QCursor(Qt.PointingHandCursor))
+        import_btn = QPushButton(f"{IconProvider.get('download')} Queue Downloads")
+        import_btn.clicked.connect(self.accept_urls)
+        import_btn.setStyleSheet(get_button_style("#27AE60"))
+        import_btn.setCursor(QCursor(Qt.PointingHandCursor))
+        buttons.addWidget(load_btn)
+        buttons.addStretch()
+        buttons.addWidget(cancel_btn)
+        buttons.addWidget(import_btn)
+        layout.addLayout(buttons)
+
+    def _build_transform_rows(self):
+        # Post-processing for this batch, run after each download finishes
+        rows = QVBoxLayout()
+        label_style = "font-size: 13px; color: #2C3E50;"
+        first = QHBoxLayout()
+        format_label = QLabel("Save as")
+        format_label.setStyleSheet(label_style)
+        self.format_combo = QComboBox()
+        for text, value in OUTPUT_FORMAT_CHOICES:
+            self.format_combo.addItem(text, value)
+        self.format_combo.setStyleSheet(COMBO_STYLE)
+        self.format_combo.setCursor(QCursor(Qt.PointingHandCursor))
+        first.addWidget(format_label)
+        first.addWidget(self.format_combo, 1)
+        rows.addLayout(first)
+
+        second = QHBoxLayout()
+        dimension_label = QLabel("Max size")
+        dimension_label.setStyleSheet(label_style)
+        self.dimension_spin = QSpinBox()
+        self.dimension_spin.setRange(0, MAX_DIMENSION_LIMIT)
+        self.dimension_spin.setSingleStep(256)
+        self.dimension_spin.setSuffix(" px")
+        self.dimension_spin.setSpecialValueText("Original")
+        self.dimension_spin.setStyleSheet(SPIN_STYLE)
+        quality_label = QLabel("Quality")
+        quality_label.setStyleSheet(label_style)
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(0, 100)
+        self.quality_spin.setSpecialValueText("Default")
+        self.quality_spin.setToolTip(
+            f"JPEG and WebP only; re-encoded files use {DEFAULT_QUALITY} by default"
+        )
+        self.quality_spin.setStyleSheet(SPIN_STYLE)
+        self.strip_check = QCheckBox("Strip metadata")
+        self.strip_check.setStyleSheet(label_style)
+        self.strip_check.setCursor(QCursor(Qt.PointingHandCursor))
+        second.addWidget(dimension_label)
+        second.addWidget(self.dimension_spin)
+        second.addWidget(quality_label)
+        second.addWidget(self.quality_spin)
+        second.addStretch()
+        second.addWidget(self.strip_check)
+        rows.addLayout(second)
+        return rows
+
+    def transform_options(self):
+        return {
+            "output_format": self.format_combo.currentData(),
+            "max_dimension": self.dimension_spin.value(),
+            "strip_metadata": self.strip_check.isChecked(),
+            "quality": self.quality_spin.value() or None,
+        }
+
+    def load_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load URL List", "", "URL lists (*.txt *.csv);;All files (*)"
+        )
+        if not path:
+            return
+        try:
+            self.text_edit.setPlainText(read_url_text(path))
+        except OSError as e:
+            self.count_label.setText(f"{IconProvider.get('error')} {e}")
+            return
+        urls = load_urls(self.text_edit.toPlainText())
+        self.count_label.setText(f"{len(urls)} unique URLs found")
+
+    def accept_urls(self):
+        self._urls = load_urls(self.text_edit.toPlainText())
+        if not self._urls:
+            self.count_label.setText(
+                f"{IconProvider.get('warning')} No valid image URLs found"
+            )
+            return
+        self.accept()
+
+    def urls(self):
+        return self._urls
@@ -0,0 +1,115 @@
+import os
+import hashlib
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, Signal
+from PySide6.QtGui import QPixmap, QColor
+from downloader.history_store import STATUS_OK
+from downloader.thumbnails import get_thumbnailer, THUMBNAIL_SIZE
+
+GALLERY_SIZE = 100
+
+LOADING = "loading"
+FAILED = "failed"
+
+
+def thumbnail_key(path, content_hash=None):
+    # Files saved exactly as served are keyed by their hash, so copies share
+    # one thumbnail; converted and some reused files come without one and
+    # are keyed by path
+    if content_hash:
+        return content_hash
+    return hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+
+
+class GalleryModel(QAbstractListModel):
+    # The most recent downloads, newest first. Thumbnails are requested from
+    # data(), which the view only calls for items it is about to paint, so
+    # decoding happens as items scroll into view and never up front.
+    PathRole = Qt.UserRole + 1
+    # Emitted from the thumbnail pool's callback thread, delivered queued
+    _thumbnail_done = Signal(str, str)
+
+    def __init__(self, parent=None, store=None):
+        super().__init__(parent)
+        self._items = []
+        # key -> QPixmap, or LOADING / FAILED
+        self._thumbnails = {}
+        # Shown while loading and for unreadable files; it also gives every
+        # cell the full icon size, which uniform item sizes relies on
+        self._placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self._placeholder.fill(QColor("#ECF0F1"))
+        self._thumbnail_done.connect(self._on_thumbnail_done)
+        if store is not None:
+            for record in reversed(store.page(limit=GALLERY_SIZE, status=STATUS_OK)):
+                if record["path"]:
+                    self._append(record["path"], record["content_hash"])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key, path = self._items[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role in (Qt.ToolTipRole, self.PathRole):
+            return path
+        if role == Qt.DecorationRole:
+            thumbnail = self._thumbnails.get(key)
+            if thumbnail is None:
+                thumbnail = self._request(key, path)
+            if isinstance(thumbnail, QPixmap):
+                return thumbnail
+            return self._placeholder
+        return None
+
+    def add(self, path, content_hash=None):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._append(path, content_hash)
+        self.endInsertRows()
+        if len(self._items) > GALLERY_SIZE:
+            self.beginRemoveRows(QModelIndex(), GALLERY_SIZE, len(self._items) - 1)
+            del self._items[GALLERY_SIZE:]
+            self.endRemoveRows()
+            self._forget_unused()
+
+    def _append(self, path, content_hash):
+        self._items.insert(0, (thumbnail_key(path, content_hash), path))
+
+    def _forget_unused(self):
+        keys = {key for key, _ in self._items}
+        for key in [key for key in self._thumbnails if key not in keys]:
+            del self._thumbnails[key]
+
+    def _request(self, key, path):
+        thumbnailer = get_thumbnailer()
+        result = thumbnailer.request(key, path)
+        if isinstance(result, str):
+            return self._load(key, result)
+        self._thumbnails[key] = LOADING
+        result.add_done_callback(
+            lambda future: self._thumbnail_done.emit(
+                key,
+                (
+                    ""
+                    if future.cancelled() or future.exception()
+                    else thumbnailer.cache.path_for(key)
+                ),
+            )
+        )
+        return LOADING
+
+    def _load(self, key, thumbnail_path):
+        pixmap = QPixmap(thumbnail_path) if thumbnail_path else QPixmap()
+        # Missing or undecodable files stay blank instead of being retried
+        self._thumbnails[key] = FAILED if pixmap.isNull() else pixmap
+        return self._thumbnails[key]
+
+    def _on_thumbnail_done(self, key, thumbnail_path):
+        if key not in self._thumbnails:
+            return
+        self._load(key, thumbnail_path)
+        for row, (item_key, _) in enumerate(self._items):
+            if item_key == key:
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
@@ -0,0 +1,195 @@
+import os
+import time
+from array import array
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from icon_provider import IconProvider
+from utils.debounce import Debouncer
+from downloader.history_store import STATUS_OK, DEFAULT_PAGE_SIZE
+
+FILTER_ALL = "all"
+FILTER_SUCCESS = "success"
+FILTER_FAILED = "failed"
+
+FILTER_CHOICES = [
+    ("All", FILTER_ALL),
+    ("Successful", FILTER_SUCCESS),
+    ("Failed", FILTER_FAILED),
+]
+
+# New entries are inserted in batches so a fast batch run costs one view
+# update per interval instead of one per finished download
+INSERT_INTERVAL_MS = 50
+
+
+def history_message(success, detail, attempts=1):
+    tries = f" ({attempts} attempts)" if attempts and attempts > 1 else ""
+    if success:
+        return f"{IconProvider.get('check')} {detail}{tries}"
+    return f"{IconProvider.get('error')} Failed{tries}: {detail}"
+
+
+class HistoryModel(QAbstractListModel):
+    # Rows are kept as parallel arrays (timestamps, success flags, messages)
+    # and formatted only when the view asks for a visible row, so 100k
+    # entries cost a few MB and appending stays O(1)
+    SuccessRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None, store=None):
+        super().__init__(parent)
+        # Earlier sessions are read from the history database a page at a
+        # time, oldest last, as the user scrolls up
+        self._store = store
+        self._oldest_id = None
+        self._exhausted = store is None
+        self._times = array("d")
+        self._success = bytearray()
+        self._messages = []
+        self._filter = FILTER_ALL
+        # Row -> entry index while a filter is active
+        self._visible = None
+        self._pending = []
+        self._insert_timer = Debouncer(
+            INSERT_INTERVAL_MS, self.flush, self, restart=False
+        )
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._messages if self._visible is None else self._visible)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = index.row() if self._visible is None else self._visible[index.row()]
+        if role == Qt.DisplayRole:
+            stamp = time.strftime("%H:%M:%S", time.localtime(self._times[entry]))
+            return f"[{stamp}] {self._messages[entry]}"
+        if role == Qt.ToolTipRole:
+            return self._messages[entry]
+        if role == self.SuccessRole:
+            return bool(self._success[entry])
+        return None
+
+    def total_count(self):
+        return len(self._messages) + len(self._pending)
+
+    def add(self, message, success=True, timestamp=None):
+        self._pending.append((timestamp or time.time(), success, message))
+        self._insert_timer.trigger()
+
+    def flush(self):
+        self._insert_timer.cancel()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        first_entry = len(self._messages)
+        matching = [
+            entry
+            for entry, (_, success, _) in enumerate(pending, first_entry)
+            if self._matches(success)
+        ]
+        if matching:
+            first_row = self.rowCount()
+            self.beginInsertRows(
+                QModelIndex(), first_row, first_row + len(matching) - 1
+            )
+        for timestamp, success, message in pending:
+            self._times.append(timestamp)
+            self._success.append(1 if success else 0)
+            self._messages.append(message)
+        if self._visible is not None:
+            self._visible.extend(matching)
+        if matching:
+            self.endInsertRows()
+
+    def can_load_older(self):
+        return not self._exhausted
+
+    def load_older(self, count=DEFAULT_PAGE_SIZE):
+        # Prepends up to count stored entries; returns how many rows appeared
+        if self._exhausted:
+            return 0
+        records = self._store.page(before_id=self._oldest_id, limit=count)
+        if len(records) < count:
+            self._exhausted = True
+        if not records:
+            return 0
+        self._oldest_id = records[-1]["id"]
+        records.reverse()
+        entries = [
+            (
+                record["finished_at"],
+                record["status"] == STATUS_OK,
+                history_message(
+                    record["status"] == STATUS_OK,
+                    (
+                        os.path.basename(record["path"] or "")
+                        if record["status"] == STATUS_OK
+                        else record["error"]
+                    ),
+                    record["attempts"],
+                ),
+            )
+            for record in records
+        ]
+        shift = len(entries)
+        matching = [
+            entry
+            for entry, (_, success, _) in enumerate(entries)
+            if self._matches(success)
+        ]
+        if matching:
+            self.beginInsertRows(QModelIndex(), 0, len(matching) - 1)
+        self._times = array("d", (entry[0] for entry in entries)) + self._times
+        self._success = bytearray(entry[1] for entry in entries) + self._success
+        self._messages = [entry[2] for entry in entries] + self._messages
+        if self._visible is not None:
+            self._visible = array(
+                "l", matching + [entry + shift for entry in self._visible]
+            )
+        if matching:
+            self.endInsertRows()
+        return len(matching)
+
+    def clear(self):
+        # Only empties the list; the stored records keep answering
+        # "downloaded before?" and come back next session
+        self._exhausted = True
+        self.beginResetModel()
+        self._insert_timer.cancel()
+        self._pending = []
+        self._times = array("d")
+        self._success = bytearray()
+        self._messages = []
+        if self._visible is not None:
+            self._visible = array("l")
+        self.endResetModel()
+
+    def filter(self):
+        return self._filter
+
+    def set_filter(self, kind):
+        if kind == self._filter:
+            return
+        self.flush()
+        self.beginResetModel()
+        self._filter = kind
+        if kind == FILTER_ALL:
+            self._visible = None
+        else:
+            self._visible = array(
+                "l",
+                (
+                    entry
+                    for entry, success in enumerate(self._success)
+                    if self._matches(success)
+                ),
+            )
+        self.endResetModel()
+
+    def _matches(self, success):
+        if self._filter == FILTER_SUCCESS:
+            return bool(success)
+        if self._filter == FILTER_FAILED:
+            return not success
+        return True
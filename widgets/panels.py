@@ -7,25 +7,22 @@ from PySide6.QtWidgets import (
     QGroupBox,
     QLineEdit,
     QScrollArea,
-    QTextEdit,
+    QListView,
+    QComboBox,
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QCursor, QIcon
 from PySide6.QtCore import QSize
 from icon_provider import IconProvider
-from utils.ui_helpers import get_button_style
+from utils.theme import CONTROLS_STYLESHEET, CARD_STYLESHEET
+from widgets.history_model import FILTER_CHOICES
+from widgets.queue_delegate import QueueItemDelegate
+from downloader.thumbnails import THUMBNAIL_SIZE
+
+HISTORY_BATCH_SIZE = 500
 
 
 def create_left_panel(main_window):
-    widget = QWidget()
-    widget.setStyleSheet(
-        """
-        QWidget {
-            background-color: white;
-            border-radius: 8px;
-        }
-    """
-    )
     layout = QVBoxLayout()
     layout.setContentsMargins(20, 20, 20, 20)
     layout.setSpacing(20)
@@ -38,6 +35,7 @@ def create_left_panel(main_window):
     content_widget = QWidget()
     content_widget.setLayout(layout)
     scroll = QScrollArea()
+    scroll.setStyleSheet(CONTROLS_STYLESHEET)
     scroll.setWidgetResizable(True)
     scroll.setWidget(content_widget)
     return scroll
@@ -58,23 +56,7 @@ def create_header_section(main_window):
         main_window.settings_btn.setIcon(QIcon(settings_icon_path))
         main_window.settings_btn.setIconSize(QSize(30, 30))
     main_window.settings_btn.setFixedSize(30, 30)
-    main_window.settings_btn.setStyleSheet(
-        """
-        QPushButton {
-            background-color: transparent;
-            border: none;
-            border-radius: 50%;
-            padding: 0;
-            min-width: 30px;
-            min-height: 30px;
-            max-width: 30px;
-            max-height: 30px;
-        }
-        QPushButton::icon {
-            margin: 0 auto;
-        }
-        """
-    )
+    main_window.settings_btn.setObjectName("settingsButton")
     main_window.settings_btn.setCursor(QCursor(Qt.PointingHandCursor))
     main_window.settings_btn.clicked.connect(main_window.open_settings_dialog)
     settings_row.addWidget(main_window.settings_btn, alignment=Qt.AlignLeft)
@@ -82,9 +64,7 @@ def create_header_section(main_window):
 
     # Title row (centered)
     title_label = QLabel("Pixora - Smart Image Downloader")
-    title_label.setStyleSheet(
-        "QLabel { color: #2C3E50; font-size: 24px; font-weight: bold; padding: 0 0 4px 0; margin: 0; }"
-    )
+    title_label.setObjectName("titleLabel")
     title_label.setAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
 
     # Add both to the main layout
@@ -99,43 +79,10 @@ def create_header_section(main_window):
 
 def create_url_input_group(main_window):
     url_group = QGroupBox(f"{IconProvider.get('link')} Image URL")
-    url_group.setStyleSheet(
-        """
-        QGroupBox {
-            font-weight: bold;
-            color: #2C3E50;
-            border: 2px solid #E0E0E0;
-            border-radius: 8px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 8px 0 8px;
-            margin-top: 2px;
-        }
-    """
-    )
     url_layout = QVBoxLayout()
     main_window.url_input = QLineEdit()
     main_window.url_input.setPlaceholderText("Paste or enter an image URL here...")
     main_window.url_input.textChanged.connect(main_window.on_url_change)
-    main_window.url_input.setStyleSheet(
-        """
-        QLineEdit {
-            padding: 12px;
-            border: 2px solid #E0E0E0;
-            border-radius: 6px;
-            font-size: 14px;
-            background: white;
-            color: #2C3E50;
-        }
-        QLineEdit:focus {
-            border-color: #3498DB;
-        }
-    """
-    )
     url_layout.addWidget(main_window.url_input)
     url_buttons = QHBoxLayout()
     icon_path = IconProvider.get_path("paste")
@@ -144,7 +91,7 @@ def create_url_input_group(main_window):
         main_window.paste_btn.setIcon(QIcon(icon_path))
         main_window.paste_btn.setIconSize(QSize(16, 16))
     main_window.paste_btn.clicked.connect(main_window.paste_clipboard)
-    main_window.paste_btn.setStyleSheet(get_button_style("#9B59B6"))
+    main_window.paste_btn.setProperty("variant", "accent")
     main_window.paste_btn.setCursor(QCursor(Qt.PointingHandCursor))
     icon_path = IconProvider.get_path("delete")
     main_window.clear_btn = QPushButton(" Clear")
@@ -152,9 +99,14 @@ def create_url_input_group(main_window):
         main_window.clear_btn.setIcon(QIcon(icon_path))
         main_window.clear_btn.setIconSize(QSize(18, 18))
     main_window.clear_btn.clicked.connect(main_window.clear_url)
-    main_window.clear_btn.setStyleSheet(get_button_style("#E74C3C"))
+    main_window.clear_btn.setProperty("variant", "danger")
     main_window.clear_btn.setCursor(QCursor(Qt.PointingHandCursor))
+    main_window.batch_btn = QPushButton(f"{IconProvider.get('queue')} Batch")
+    main_window.batch_btn.clicked.connect(main_window.open_batch_import)
+    main_window.batch_btn.setProperty("variant", "primary")
+    main_window.batch_btn.setCursor(QCursor(Qt.PointingHandCursor))
     url_buttons.addWidget(main_window.paste_btn)
+    url_buttons.addWidget(main_window.batch_btn)
     url_buttons.addWidget(main_window.clear_btn)
     url_layout.addLayout(url_buttons)
     url_group.setLayout(url_layout)
@@ -165,42 +117,9 @@ def create_filename_input_group(main_window):
     filename_group = QGroupBox(
         f"{IconProvider.get('filename')} Custom Filename (Optional)"
     )
-    filename_group.setStyleSheet(
-        """
-        QGroupBox {
-            font-weight: bold;
-            color: #2C3E50;
-            border: 2px solid #E0E0E0;
-            border-radius: 8px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 8px 0 8px;
-            margin-top: 2px;
-        }
-    """
-    )
     filename_layout = QVBoxLayout()
     main_window.filename_input = QLineEdit()
     main_window.filename_input.setPlaceholderText("Enter custom filename (optional)...")
-    main_window.filename_input.setStyleSheet(
-        """
-        QLineEdit {
-            padding: 12px;
-            border: 2px solid #E0E0E0;
-            border-radius: 6px;
-            font-size: 14px;
-            background: white;
-            color: #2C3E50;
-        }
-        QLineEdit:focus {
-            border-color: #3498DB;
-        }
-    """
-    )
     main_window.filename_input.textChanged.connect(main_window.on_filename_change)
     filename_layout.addWidget(main_window.filename_input)
     filename_buttons = QHBoxLayout()
@@ -210,7 +129,7 @@ def create_filename_input_group(main_window):
         main_window.filename_paste_btn.setIcon(QIcon(icon_path))
         main_window.filename_paste_btn.setIconSize(QSize(16, 16))
     main_window.filename_paste_btn.clicked.connect(main_window.paste_filename)
-    main_window.filename_paste_btn.setStyleSheet(get_button_style("#9B59B6"))
+    main_window.filename_paste_btn.setProperty("variant", "accent")
     main_window.filename_paste_btn.setCursor(QCursor(Qt.PointingHandCursor))
     icon_path = IconProvider.get_path("delete")
     main_window.filename_clear_btn = QPushButton(" Clear")
@@ -218,7 +137,7 @@ def create_filename_input_group(main_window):
         main_window.filename_clear_btn.setIcon(QIcon(icon_path))
         main_window.filename_clear_btn.setIconSize(QSize(18, 18))
     main_window.filename_clear_btn.clicked.connect(main_window.clear_filename)
-    main_window.filename_clear_btn.setStyleSheet(get_button_style("#E74C3C"))
+    main_window.filename_clear_btn.setProperty("variant", "danger")
     main_window.filename_clear_btn.setCursor(QCursor(Qt.PointingHandCursor))
     filename_buttons.addWidget(main_window.filename_paste_btn)
     filename_buttons.addWidget(main_window.filename_clear_btn)
@@ -229,51 +148,21 @@ def create_filename_input_group(main_window):
 
 def create_folder_group(main_window):
     folder_group = QGroupBox(f"{IconProvider.get('folder')} Download Location")
-    folder_group.setStyleSheet(
-        """
-        QGroupBox {
-            font-weight: bold;
-            color: #2C3E50;
-            border: 2px solid #E0E0E0;
-            border-radius: 8px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 8px 0 8px;
-            margin-top: 2px;
-        }
-    """
-    )
     folder_layout = QVBoxLayout()
     main_window.folder_label = QLabel("No folder selected")
-    main_window.folder_label.setStyleSheet(
-        """
-        QLabel {
-            color: #7F8C8D;
-            font-size: 13px;
-            font-weight: 600;
-            background: #ECF0F1;
-            padding: 10px;
-            border-radius: 6px;
-            border: 1px solid #BDC3C7;
-        }
-    """
-    )
+    main_window.folder_label.setObjectName("folderLabel")
     folder_layout.addWidget(main_window.folder_label)
     folder_buttons = QHBoxLayout()
     main_window.folder_btn = QPushButton(
         f"{IconProvider.get('folder_open')} Choose Folder"
     )
     main_window.folder_btn.clicked.connect(main_window.choose_folder)
-    main_window.folder_btn.setStyleSheet(get_button_style("#27AE60"))
+    main_window.folder_btn.setProperty("variant", "success")
     main_window.folder_btn.setCursor(QCursor(Qt.PointingHandCursor))
     main_window.open_btn = QPushButton(f"{IconProvider.get('folder_open')} Open Folder")
     main_window.open_btn.clicked.connect(main_window.open_folder)
     main_window.open_btn.setEnabled(False)
-    main_window.open_btn.setStyleSheet(get_button_style("#34495E"))
+    main_window.open_btn.setProperty("variant", "neutral")
     main_window.open_btn.setCursor(QCursor(Qt.PointingHandCursor))
     folder_buttons.addWidget(main_window.folder_btn)
     folder_buttons.addWidget(main_window.open_btn)
@@ -289,7 +178,8 @@ def create_download_button(main_window):
         download_btn.setIcon(QIcon(icon_path))
         download_btn.setIconSize(QSize(24, 24))
     download_btn.clicked.connect(main_window.download_image)
-    download_btn.setStyleSheet(get_button_style("#FF69B4", large=True))
+    download_btn.setProperty("variant", "download")
+    download_btn.setProperty("buttonSize", "large")
     download_btn.setCursor(QCursor(Qt.PointingHandCursor))
     main_window.download_btn = download_btn
     return download_btn
@@ -297,106 +187,175 @@ def create_download_button(main_window):
 
 def create_right_panel(main_window):
     widget = QWidget()
-    widget.setStyleSheet(
-        """
-        QWidget {
-            background-color: white;
-            border-radius: 8px;
-        }
-    """
-    )
+    widget.setStyleSheet(CARD_STYLESHEET)
     layout = QVBoxLayout()
     layout.setContentsMargins(20, 20, 20, 20)
     layout.setSpacing(15)
     # Status Group
     status_group = QGroupBox(f"{IconProvider.get('check')} Status")
-    status_group.setStyleSheet(
-        """
-        QGroupBox {
-            font-weight: bold;
-            color: #2C3E50;
-            border: 2px solid #E0E0E0;
-            border-radius: 8px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 8px 0 8px;
-            margin-top: 2px;
-        }
-    """
-    )
     status_layout = QVBoxLayout()
     main_window.status_label = QLabel("Ready to download images")
-    main_window.status_label.setStyleSheet(
-        """
-        QLabel {
-            color: #7F8C8D;
-            font-size: 14px;
-            padding: 12px;
-            background: #ECF0F1;
-            border-radius: 6px;
-            border-left: 4px solid #3498DB;
-        }
-    """
-    )
+    main_window.status_label.setObjectName("statusLabel")
     main_window.status_label.setWordWrap(True)
     status_layout.addWidget(main_window.status_label)
+    metrics_row = QHBoxLayout()
+    main_window.metrics_label = QLabel("No downloads measured yet")
+    main_window.metrics_label.setObjectName("metricsLabel")
+    main_window.metrics_label.setWordWrap(True)
+    export_metrics_btn = QPushButton(IconProvider.get("save"))
+    export_metrics_btn.setToolTip("Export download timings as JSON or CSV")
+    export_metrics_btn.setFixedWidth(40)
+    export_metrics_btn.clicked.connect(main_window.export_metrics)
+    export_metrics_btn.setProperty("variant", "neutral")
+    export_metrics_btn.setProperty("buttonSize", "small")
+    export_metrics_btn.setCursor(QCursor(Qt.PointingHandCursor))
+    metrics_row.addWidget(main_window.metrics_label, 1)
+    metrics_row.addWidget(export_metrics_btn, 0, Qt.AlignTop)
+    status_layout.addLayout(metrics_row)
     status_group.setLayout(status_layout)
     layout.addWidget(status_group)
+    layout.addWidget(create_queue_group(main_window))
+    layout.addWidget(create_gallery_group(main_window))
     # Download History Group
     history_group = QGroupBox(f"{IconProvider.get('save')} Download History")
-    history_group.setStyleSheet(
-        """
-        QGroupBox {
-            font-weight: bold;
-            color: #2C3E50;
-            border: 2px solid #E0E0E0;
-            border-radius: 8px;
-            margin-top: 10px;
-            padding-top: 10px;
-        }
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            left: 10px;
-            padding: 0 5px 0 5px;
-        }
-    """
-    )
     history_layout = QVBoxLayout()
-    main_window.history_text = QTextEdit()
-    main_window.history_text.setReadOnly(True)
-    main_window.history_text.setMaximumHeight(200)
-    main_window.history_text.setStyleSheet(
-        """
-        QTextEdit {
-            background: #F8F9FA;
-            border: 1px solid #E0E0E0;
-            border-radius: 6px;
-            padding: 8px;
-            font-size: 12px;
-            color: #2C3E50;
-        }
-    """
+    main_window.history_view = QListView()
+    main_window.history_view.setObjectName("historyView")
+    main_window.history_view.setModel(main_window.history_model)
+    # Only the visible rows are painted, and batched layout keeps appends
+    # from re-laying out every existing row
+    main_window.history_view.setUniformItemSizes(True)
+    main_window.history_view.setLayoutMode(QListView.Batched)
+    main_window.history_view.setBatchSize(HISTORY_BATCH_SIZE)
+    main_window.history_view.setMaximumHeight(200)
+    main_window.history_empty_label = QLabel("No downloads yet...")
+    main_window.history_empty_label.setObjectName("historyEmptyLabel")
+    history_model = main_window.history_model
+    history_model.rowsInserted.connect(lambda: follow_history(main_window))
+    history_model.rowsInserted.connect(lambda: update_history_placeholder(main_window))
+    history_model.modelReset.connect(lambda: update_history_placeholder(main_window))
+    main_window.history_view.verticalScrollBar().valueChanged.connect(
+        lambda value: load_older_history(main_window, value)
     )
-    main_window.history_text.setPlainText("No downloads yet...")
-    history_layout.addWidget(main_window.history_text)
+    history_layout.addWidget(main_window.history_empty_label)
+    history_layout.addWidget(main_window.history_view)
+    history_model.load_older()
+    main_window.history_view.scrollToBottom()
+    update_history_placeholder(main_window)
     icon_path = IconProvider.get_path("delete")
     clear_history_btn = QPushButton(" Clear History")
     if icon_path:
         clear_history_btn.setIcon(QIcon(icon_path))
         clear_history_btn.setIconSize(QSize(18, 18))
     clear_history_btn.clicked.connect(main_window.clear_history)
-    clear_history_btn.setStyleSheet(
-        get_button_style("#E74C3C", small=True)
-        + "QPushButton { padding-top: 10px; padding-bottom: 10px; }"
-    )
+    clear_history_btn.setObjectName("clearHistoryButton")
+    clear_history_btn.setProperty("variant", "danger")
+    clear_history_btn.setProperty("buttonSize", "small")
     clear_history_btn.setCursor(QCursor(Qt.PointingHandCursor))
-    history_layout.addWidget(clear_history_btn)
+    main_window.history_filter = QComboBox()
+    for text, value in FILTER_CHOICES:
+        main_window.history_filter.addItem(text, value)
+    main_window.history_filter.setCursor(QCursor(Qt.PointingHandCursor))
+    main_window.history_filter.currentIndexChanged.connect(
+        lambda: history_model.set_filter(main_window.history_filter.currentData())
+    )
+    history_buttons = QHBoxLayout()
+    history_buttons.addWidget(main_window.history_filter)
+    history_buttons.addWidget(clear_history_btn)
+    history_layout.addLayout(history_buttons)
     history_group.setLayout(history_layout)
     layout.addWidget(history_group)
     layout.addStretch()
     widget.setLayout(layout)
     return widget
+
+
+def create_queue_group(main_window):
+    queue_group = QGroupBox(f"{IconProvider.get('queue')} Download Queue")
+    queue_layout = QVBoxLayout()
+    main_window.queue_view = QListView()
+    main_window.queue_view.setModel(main_window.queue_model)
+    main_window.queue_view.setItemDelegate(QueueItemDelegate(main_window.queue_view))
+    main_window.queue_view.setUniformItemSizes(True)
+    main_window.queue_view.setMaximumHeight(150)
+    # A stalled download sends no progress, so its row is only repainted
+    # by the clock that refreshes the metrics while the queue is busy
+    main_window.metrics_timer.timeout.connect(main_window.queue_view.viewport().update)
+    main_window.queue_view.setContextMenuPolicy(Qt.CustomContextMenu)
+    main_window.queue_view.customContextMenuRequested.connect(
+        main_window.show_queue_menu
+    )
+    queue_layout.addWidget(main_window.queue_view)
+    queue_buttons = QHBoxLayout()
+    cancel_all_btn = QPushButton(f"{IconProvider.get('cancel')} Cancel All")
+    cancel_all_btn.clicked.connect(main_window.download_queue.cancel_all)
+    cancel_all_btn.setProperty("variant", "danger")
+    cancel_all_btn.setProperty("buttonSize", "small")
+    cancel_all_btn.setCursor(QCursor(Qt.PointingHandCursor))
+    clear_finished_btn = QPushButton(f"{IconProvider.get('clear')} Clear Finished")
+    clear_finished_btn.clicked.connect(main_window.queue_model.clear_finished)
+    clear_finished_btn.setProperty("variant", "neutral")
+    clear_finished_btn.setProperty("buttonSize", "small")
+    clear_finished_btn.setCursor(QCursor(Qt.PointingHandCursor))
+    queue_buttons.addWidget(cancel_all_btn)
+    queue_buttons.addWidget(clear_finished_btn)
+    queue_layout.addLayout(queue_buttons)
+    queue_group.setLayout(queue_layout)
+    return queue_group
+
+
+def create_gallery_group(main_window):
+    gallery_group = QGroupBox(f"{IconProvider.get('image')} Recent Downloads")
+    gallery_layout = QVBoxLayout()
+    main_window.gallery_view = QListView()
+    main_window.gallery_view.setObjectName("galleryView")
+    main_window.gallery_view.setModel(main_window.gallery_model)
+    # A single scrolling row of fixed-size cells; only the cells in view ask
+    # the model for a thumbnail
+    main_window.gallery_view.setViewMode(QListView.IconMode)
+    main_window.gallery_view.setFlow(QListView.LeftToRight)
+    main_window.gallery_view.setWrapping(False)
+    main_window.gallery_view.setMovement(QListView.Static)
+    main_window.gallery_view.setUniformItemSizes(True)
+    main_window.gallery_view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    main_window.gallery_view.setGridSize(
+        QSize(THUMBNAIL_SIZE + 16, THUMBNAIL_SIZE + 28)
+    )
+    main_window.gallery_view.setTextElideMode(Qt.ElideMiddle)
+    main_window.gallery_view.setFixedHeight(THUMBNAIL_SIZE + 52)
+    main_window.gallery_view.setCursor(QCursor(Qt.PointingHandCursor))
+    main_window.gallery_view.doubleClicked.connect(main_window.open_gallery_item)
+    gallery_layout.addWidget(main_window.gallery_view)
+    gallery_group.setLayout(gallery_layout)
+    return gallery_group
+
+
+def follow_history(main_window):
+    # Keep showing the newest entries unless the user scrolled up to read
+    scroll_bar = main_window.history_view.verticalScrollBar()
+    if scroll_bar.value() >= scroll_bar.maximum():
+        main_window.history_view.scrollToBottom()
+
+
+def update_history_placeholder(main_window):
+    history_model = main_window.history_model
+    empty = history_model.rowCount() == 0
+    main_window.history_empty_label.setText(
+        "No matching downloads"
+        if history_model.total_count()
+        else "No downloads yet..."
+    )
+    main_window.history_empty_label.setVisible(empty)
+    main_window.history_view.setVisible(not empty)
+
+
+def load_older_history(main_window, value):
+    scroll_bar = main_window.history_view.verticalScrollBar()
+    history_model = main_window.history_model
+    if value > scroll_bar.minimum() or not history_model.can_load_older():
+        return
+    if added := history_model.load_older():
+        # Keep the row the user was looking at in place
+        main_window.history_view.scrollTo(
+            history_model.index(added, 0), QListView.PositionAtTop
+        )
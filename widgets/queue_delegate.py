@@ -0,0 +1,55 @@
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtCore import Qt
+from widgets.queue_model import QueueModel
+from downloader.progress import describe_transfer, transfer_stalled
+
+# Share of the row given to the progress bar of a running download
+BAR_FRACTION = 0.5
+BAR_MARGIN = 3
+BAR_FONT_PX = 10
+TRACK_COLOR = QColor("#E0E0E0")
+FILL_COLOR = QColor("#3498DB")
+STALLED_COLOR = QColor("#F39C12")
+TEXT_COLOR = QColor("#2C3E50")
+
+
+class QueueItemDelegate(QStyledItemDelegate):
+    # Rows keep their single line, so uniform item sizes still apply; a
+    # running download gives the right part of its row to a progress bar
+    # labelled with percent, speed and ETA (or how long it has been stalled)
+    def paint(self, painter, option, index):
+        transfer = index.data(QueueModel.TransferRole)
+        if transfer is None:
+            super().paint(painter, option, index)
+            return
+        bar = option.rect.adjusted(
+            option.rect.width() - int(option.rect.width() * BAR_FRACTION),
+            BAR_MARGIN,
+            -BAR_MARGIN,
+            -BAR_MARGIN,
+        )
+        text_option = QStyleOptionViewItem(option)
+        text_option.rect = option.rect.adjusted(0, 0, -(bar.width() + BAR_MARGIN), 0)
+        super().paint(painter, text_option, index)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(TRACK_COLOR)
+        painter.drawRoundedRect(bar, 4, 4)
+        stalled = transfer_stalled(transfer)
+        if transfer["total"]:
+            fraction = min(1.0, transfer["received"] / transfer["total"])
+            filled = bar.adjusted(0, 0, -int(bar.width() * (1 - fraction)), 0)
+            painter.setBrush(STALLED_COLOR if stalled else FILL_COLOR)
+            painter.drawRoundedRect(filled, 4, 4)
+        painter.setPen(TEXT_COLOR)
+        font = painter.font()
+        font.setPixelSize(BAR_FONT_PX)
+        painter.setFont(font)
+        text = painter.fontMetrics().elidedText(
+            describe_transfer(transfer, short=True), Qt.ElideRight, bar.width() - 4
+        )
+        painter.drawText(bar, Qt.AlignCenter, text)
+        painter.restore()
@@ -0,0 +1,80 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from icon_provider import IconProvider
+from downloader.progress import describe_transfer
+
+STATUS_ICONS = {
+    "queued": "queued",
+    "running": "download",
+    "done": "check",
+    "failed": "error",
+    "cancelled": "cancel",
+}
+
+
+class QueueModel(QAbstractListModel):
+    JobIdRole = Qt.UserRole + 1
+    # TransferProgress snapshot of a running job once its body is downloading
+    TransferRole = Qt.UserRole + 2
+
+    def __init__(self, download_queue, parent=None):
+        super().__init__(parent)
+        self.download_queue = download_queue
+        self._job_ids = []
+        self._rows = {}
+        download_queue.jobs_added.connect(self.on_jobs_added)
+        download_queue.job_status_changed.connect(self.on_job_changed)
+        download_queue.jobs_progressed.connect(self.on_jobs_progressed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._job_ids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        job = self.download_queue.jobs[self._job_ids[index.row()]]
+        if role == Qt.DisplayRole:
+            return f"{IconProvider.get(STATUS_ICONS[job.status])} {job.url}"
+        if role == Qt.ToolTipRole:
+            lines = [job.url, job.message]
+            if self._transferring(job):
+                lines.append(describe_transfer(job.transfer))
+            return "\n".join(line for line in lines if line)
+        if role == self.JobIdRole:
+            return job.job_id
+        if role == self.TransferRole:
+            return job.transfer if self._transferring(job) else None
+        return None
+
+    def _transferring(self, job):
+        return job.status == "running" and job.transfer is not None
+
+    def on_jobs_added(self, first_id, last_id):
+        first_row = len(self._job_ids)
+        last_row = first_row + last_id - first_id
+        self.beginInsertRows(QModelIndex(), first_row, last_row)
+        for row, job_id in enumerate(range(first_id, last_id + 1), first_row):
+            self._job_ids.append(job_id)
+            self._rows[job_id] = row
+        self.endInsertRows()
+
+    def on_job_changed(self, job_id, _value=None):
+        if (row := self._rows.get(job_id)) is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def on_jobs_progressed(self, job_ids):
+        # One signal for the whole frame's worth of updates
+        rows = [
+            row for job_id in job_ids if (row := self._rows.get(job_id)) is not None
+        ]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)))
+
+    def clear_finished(self):
+        self.download_queue.remove_finished()
+        self.beginResetModel()
+        self._job_ids = [
+            job_id for job_id in self._job_ids if job_id in self.download_queue.jobs
+        ]
+        self._rows = {job_id: row for row, job_id in enumerate(self._job_ids)}
+        self.endResetModel()